@@ -8,11 +8,17 @@ from pathlib import Path
 from supabase import create_client, Client
 from typing import Optional
 import logging
+import uuid
 
 from mcp_agent.app import MCPApp
-from mcp_agent.agents.agent import Agent
 from mcp_agent.workflows.llm.augmented_llm import RequestParams
-from mcp_agent.workflows.llm.augmented_llm_openai import OpenAIAugmentedLLM
+from .prefetch import StatePrefetcher
+from .retrieval import MoveIndex, estimate_tokens
+from .runlog import MoveRecordWriter
+from .scheduler import TurnScheduler
+from .tracing import SamplingProfiler, tracer
+from .turns import TOOL_MAX_WAIT, CheckpointingAgent, ToolCallRecord, TurnCheckpoint, run_turn
+from .usage import UsageTrackingLLM
 from .utils import load_markdown_instructions, update_secrets_from_env
 
 # Supabase configuration
@@ -96,7 +102,10 @@ INSTRUCTION_FILE = "instructions.md"
 STATE_FILE = "agent_state.json"
 AGENT_LOG_FILE = "agent-output.log"
 MAX_WAIT = 900  # 15 minutes, same as wait function
-LLM_MAX_WAIT = 60
+LLM_MAX_WAIT = 60  # Seconds of model time per turn; time spent in tool calls is budgeted separately
+RECENT_MOVES = 2  # Most recent moves, always included in the prompt
+RETRIEVED_MOVES = 5  # Older moves retrieved by relevance to the current situation
+HISTORY_TOKEN_BUDGET = 3000  # Token budget for the retrieved moves
 
 # Update `mcp_agent.secrets.yaml` from environment variables
 update_secrets_from_env()
@@ -185,7 +194,85 @@ async def write_to_supabase(message: str, move_number: int, timestamp: datetime.
     except Exception as e:
         logger.error(f"Error writing to Supabase: {e}")
 
+def build_prompt(agent_memory: dict, move_index: MoveIndex, state_summary: str = "") -> str:
+    """
+    Build the prompt for the next turn.
+    
+    The most recent moves are always included. Older moves are retrieved from
+    the move index by relevance to the current situation (notes and recent
+    moves), so the prompt stays within a fixed budget as the game grows.
+    
+    Args:
+        agent_memory: The agent's memory (moves history, notes, timeout state)
+        move_index: Retrieval index over the moves history
+        state_summary: Prefetched game state, if available
+        
+    Returns:
+        The prompt for the next turn
+    """
+    moves_history = agent_memory["moves_history"]
+    
+    # Determine prompt based on whether this is the first turn or after a timeout
+    if not moves_history:
+        prompt = INITIAL_PROMPT
+    elif agent_memory.get("last_turn_timeout", False):
+        prompt = TIMEOUT_PROMPT
+        
+        # Resume from the tool calls that completed before the timeout
+        if agent_memory.get("interrupted_turn_calls"):
+            prompt += (
+                "\n## Tool Calls Made Before The Timeout\n"
+                "These calls already ran; use their results instead of repeating them. "
+                "Calls marked TIMED OUT may still have taken effect; check the game state first.\n"
+            )
+            for call in agent_memory["interrupted_turn_calls"]:
+                prompt += f"- {ToolCallRecord(**call).describe()}\n"
+    else:
+        prompt = TURN_PROMPT
+    
+    # Add the state fetched ahead of this turn, saving a tool call
+    if state_summary:
+        prompt += (
+            "\n\n## Current State (prefetched)\n"
+            "This state was fetched for you just before this turn. "
+            "Only call dark_forest or get_spaceship_state if you need more detail.\n"
+            f"{state_summary}\n"
+        )
+    
+    # Add agent's own notes to the prompt
+    if agent_memory["notes"]:
+        prompt += f"\n\n## Your Notes\n{agent_memory['notes']}\n"
+    
+    if not moves_history:
+        return prompt
+    
+    recent_start = max(0, len(moves_history) - RECENT_MOVES)
+    
+    # Add relevant earlier moves, in chronological order
+    query = agent_memory["notes"] + "\n" + "\n".join(moves_history[recent_start:])
+    relevant = move_index.select(
+        query,
+        k=RETRIEVED_MOVES,
+        token_budget=HISTORY_TOKEN_BUDGET,
+        exclude_last=len(moves_history) - recent_start
+    )
+    if relevant:
+        prompt += "\n## Relevant Earlier Moves\n"
+        for i in relevant:
+            prompt += f"Move {i + 1}: {moves_history[i]}\n"
+    
+    # Add recent move history
+    prompt += "\n## Your Recent Moves\n"
+    for i in range(recent_start, len(moves_history)):
+        prompt += f"Move {i + 1}: {moves_history[i]}\n"
+    
+    return prompt
+
 async def run():
+    # Identifies this run in the structured move records
+    run_id = uuid.uuid4().hex[:12]
+    move_records = MoveRecordWriter()
+    
     # Track overall connection attempts
     connection_attempts = 0
     reconnect_delay = 5  # seconds
@@ -209,18 +296,22 @@ async def run():
                 # Load instructions from markdown file, preserving formatting
                 instructions = load_markdown_instructions(INSTRUCTION_FILE)
 
-                agent = Agent(
+                agent = CheckpointingAgent(
                     name=AGENT_NAME,
                     instruction=instructions,
                     server_names=["solana", "dark_forest"],
                     functions=[wait_function],
+                    tool_timeouts={"wait_function": MAX_WAIT + TOOL_MAX_WAIT},
                 )
                 
                 async with agent:
                     tools = await agent.list_tools()
                     app_logger.info("Tools available:", data=tools)
 
-                    llm = await agent.attach_llm(OpenAIAugmentedLLM)
+                    llm = await agent.attach_llm(UsageTrackingLLM)
+                    
+                    prefetcher = StatePrefetcher(agent, [tool.name for tool in tools.tools])
+                    await prefetcher.refresh()
 
                     agent_memory = {
                         "moves_history": [],
@@ -241,92 +332,153 @@ async def run():
                         except Exception as e:
                             app_logger.error(f"Error loading agent memory: {e}")
                     
+                    # Index the full move journal for retrieval
+                    move_index = MoveIndex()
+                    for move in agent_memory["moves_history"]:
+                        move_index.add(move)
+                    
+                    scheduler = TurnScheduler()
+                    
                     # Game loop
                     consecutive_timeouts = 0
                     max_consecutive_timeouts = 3  # Threshold to trigger reconnection
                     
                     while True:
-                        # Determine prompt based on whether this is the first turn or after a timeout
-                        if not agent_memory["moves_history"]:
-                            prompt = INITIAL_PROMPT
-                        elif agent_memory.get("last_turn_timeout", False):
-                            prompt = TIMEOUT_PROMPT
-                        else:
-                            prompt = TURN_PROMPT
-                        
-                        # Add agent's own notes and recent history to the prompt
-                        if agent_memory["notes"]:
-                            prompt += f"\n\n## Your Notes\n{agent_memory['notes']}\n"
-                        
-                        # Add recent move history (last 5 moves)
-                        if agent_memory["moves_history"]:
-                            prompt += "\n## Your Recent Moves\n"
-                            for i, move in enumerate(agent_memory["moves_history"][-5:]):
-                                prompt += f"Move {len(agent_memory['moves_history']) - 5 + i + 1}: {move}\n"
-                        
-                        # Generate response with timeout
-                        app_logger.info("Generating next move")
-                        try:
-                            response = await asyncio.wait_for(
-                                llm.generate_str(
-                                    message=prompt,
-                                    request_params=RequestParams(maxTokens=16000)
-                                ),
-                                timeout=LLM_MAX_WAIT
-                            )
-                            agent_memory["last_turn_timeout"] = False
-                            consecutive_timeouts = 0  # Reset consecutive timeouts counter
-                        except asyncio.TimeoutError:
-                            app_logger.warning(f"Turn timed out after {LLM_MAX_WAIT} seconds")
-                            agent_memory["timeout_count"] += 1
-                            agent_memory["last_turn_timeout"] = True
-                            consecutive_timeouts += 1
-                            response = "TIMEOUT: The previous LLM call exceeded the time limit."
+                        turn_started = datetime.datetime.now()
+                        tracer.pop_phases()  # Leave the time between turns out of this move's phases
+                        reconnect = False
+                        response = ""
+                        move_number = len(agent_memory["moves_history"]) + 1
+                        with tracer.span("turn", move_number=move_number) as turn_span:
+                            with tracer.span("prompt_build") as span:
+                                prompt = build_prompt(agent_memory, move_index, prefetcher.summary())
+                                span["estimated_tokens"] = estimate_tokens(prompt)
                             
-                            # If we hit consecutive timeouts threshold, break to reconnect
-                            if consecutive_timeouts >= max_consecutive_timeouts:
-                                app_logger.warning(f"Hit {consecutive_timeouts} consecutive timeouts. Reconnecting...")
-                                break
-                        except Exception as e:
-                            app_logger.error(f"Error during turn: {e}")
-                            response = f"ERROR: An unexpected error occurred: {str(e)}"
-                            # For connection errors, break to reconnect
-                            if "connection" in str(e).lower() or "timeout" in str(e).lower():
-                                app_logger.warning("Detected connection error. Reconnecting...")
+                            # Generate response with timeout
+                            app_logger.info("Generating next move")
+                            checkpoint = TurnCheckpoint()
+                            try:
+                                # Each completion takes its share of the process-wide LLM
+                                # budget as it is made (see UsageRecordingExecutor)
+                                with tracer.span("llm"):
+                                    response = await run_turn(
+                                        agent,
+                                        llm.generate_str(
+                                            message=prompt,
+                                            request_params=RequestParams(maxTokens=16000)
+                                        ),
+                                        checkpoint,
+                                        thinking_budget=LLM_MAX_WAIT
+                                    )
+                                agent_memory["last_turn_timeout"] = False
+                                agent_memory["interrupted_turn_calls"] = []
+                                consecutive_timeouts = 0  # Reset consecutive timeouts counter
+                                scheduler.record_outcome("ok")
+                                turn_span["outcome"] = "ok"
+                            except asyncio.TimeoutError as e:
+                                app_logger.warning(f"Turn timed out: {e}")
+                                scheduler.record_outcome("timeout")
+                                turn_span["outcome"] = "timeout"
+                                agent_memory["timeout_count"] += 1
+                                agent_memory["last_turn_timeout"] = True
+                                agent_memory["interrupted_turn_calls"] = checkpoint.to_json()
                                 consecutive_timeouts += 1
+                                response = "TIMEOUT: The previous LLM call exceeded the time limit."
+                                if checkpoint.calls:
+                                    response += "\nTool calls made before the timeout:\n" + "\n".join(
+                                        call.describe() for call in checkpoint.calls
+                                    )
+                                
+                                # If we hit consecutive timeouts threshold, reconnect after recording the turn
                                 if consecutive_timeouts >= max_consecutive_timeouts:
-                                    break
-                        
-                        # Calculate move number and timestamp
-                        move_number = len(agent_memory["moves_history"]) + 1
-                        timestamp = datetime.datetime.now()
-                        
-                        # Log the response to file
-                        log_to_file(response, move_number)
-                        
-                        # Write to Supabase
-                        await write_to_supabase(response, move_number, timestamp)
-                        
-                        # Extract notes from the response (if the agent formats them)
-                        if "## Notes" in response:
-                            notes_section = response.split("## Notes")[1].split("##")[0].strip()
-                            agent_memory["notes"] = notes_section
-                        
-                        # Save the move to history
-                        agent_memory["moves_history"].append(response)
+                                    app_logger.warning(f"Hit {consecutive_timeouts} consecutive timeouts. Reconnecting...")
+                                    reconnect = True
+                            except Exception as e:
+                                app_logger.error(f"Error during turn: {e}")
+                                scheduler.record_outcome("error")
+                                turn_span["outcome"] = "error"
+                                response = f"ERROR: An unexpected error occurred: {str(e)}"
+                                # For connection errors, reconnect after recording the turn
+                                if "connection" in str(e).lower() or "timeout" in str(e).lower():
+                                    app_logger.warning("Detected connection error. Reconnecting...")
+                                    consecutive_timeouts += 1
+                                    if consecutive_timeouts >= max_consecutive_timeouts:
+                                        reconnect = True
+                            finally:
+                                # Reported usage of every completion of the turn,
+                                # including the rounds after each tool call
+                                usage = llm.pop_usage()
+                                turn_span["prompt_tokens"] = usage.prompt_tokens
+                                turn_span["completion_tokens"] = usage.completion_tokens
+                            
+                            if not reconnect:
+                                timestamp = datetime.datetime.now()
+                                
+                                # Log the response to file
+                                with tracer.span("log_to_file"):
+                                    log_to_file(response, move_number)
+                                
+                                # Write to Supabase
+                                with tracer.span("supabase"):
+                                    await write_to_supabase(response, move_number, timestamp)
+                                
+                                # Extract notes from the response (if the agent formats them)
+                                if "## Notes" in response:
+                                    notes_section = response.split("## Notes")[1].split("##")[0].strip()
+                                    agent_memory["notes"] = notes_section
+                                
+                                # Save the move to history
+                                agent_memory["moves_history"].append(response)
+                                move_index.add(response)
+                                
+                                # Log the agent's response
+                                app_logger.info(f"Agent response: {response}")
+                            
+                            # Save memory after each turn, also before a reconnect reloads
+                            # it, so the calls of an interrupted turn are not lost
+                            try:
+                                with tracer.span("state_save"), open(memory_path, 'w') as f:
+                                    json.dump(agent_memory, f, indent=2)
+                            except Exception as e:
+                                app_logger.error(f"Error saving agent memory: {e}")
                         
-                        # Save memory after each move
+                        # Append a structured record of the move, including turns that
+                        # end in a reconnect, once the turn span has been timed
+                        ended = datetime.datetime.now()
                         try:
-                            with open(memory_path, 'w') as f:
-                                json.dump(agent_memory, f, indent=2)
+                            move_records.write({
+                                "run_id": run_id,
+                                "move_number": move_number,
+                                "started_at": turn_started.isoformat(),
+                                "ended_at": ended.isoformat(),
+                                "duration_s": (ended - turn_started).total_seconds(),
+                                "outcome": turn_span.get("outcome"),
+                                "reconnect": reconnect,
+                                "phases": tracer.pop_phases(),
+                                "tools": [
+                                    {k: v for k, v in call.items() if k not in ("arguments", "result")}
+                                    for call in checkpoint.to_json()
+                                ],
+                                "completions": usage.completions,
+                                "prompt_tokens": usage.prompt_tokens,
+                                "completion_tokens": usage.completion_tokens,
+                            })
                         except Exception as e:
-                            app_logger.error(f"Error saving agent memory: {e}")
+                            app_logger.error(f"Error writing move record: {e}")
                         
-                        # Log the agent's response
-                        app_logger.info(f"Agent response: {response}")
-
-                        # Sleep for 1 second between turns
-                        await asyncio.sleep(10)
+                        if reconnect:
+                            tracer.flush()
+                            break
+                        
+                        # Schedule the next turn from the ship's current status,
+                        # prefetching state for it while waiting
+                        with tracer.span("schedule"):
+                            await prefetcher.refresh()
+                            ship_status = prefetcher.get("ship_status")
+                            delay = scheduler.next_delay(ship_status.text if ship_status else None)
+                        tracer.flush()
+                        with tracer.span("sleep", seconds=delay):
+                            await prefetcher.sleep_and_refresh(delay)
                     
                     # If we broke out of the game loop, we need to reconnect
                     app_logger.info("Exited game loop, will attempt to reconnect")
@@ -343,4 +495,12 @@ async def run():
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
\ No newline at end of file
+    # Opt-in sampling profiler, written to logs/profile.folded on exit
+    profiler = SamplingProfiler() if os.getenv("SPUTNIK_PROFILE") == "1" else None
+    if profiler:
+        profiler.start()
+    try:
+        asyncio.run(run())
+    finally:
+        if profiler:
+            profiler.stop()
\ No newline at end of file
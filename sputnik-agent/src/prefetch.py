@@ -0,0 +1,158 @@
+"""Speculative prefetch of game state between agent turns."""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("sputnik.prefetch")
+
+# State fetched before each turn: label -> (server name, tool name, arguments)
+PREFETCH_TOOLS: Dict[str, Tuple[str, str, Dict[str, Any]]] = {
+    "ship_status": ("dark_forest", "get_spaceship_state", {"request": {}}),
+}
+PREFETCH_TIMEOUT = 10  # Seconds allowed for each prefetch tool call
+PREFETCH_LEAD = 5  # Seconds before the next turn at which prefetching starts
+PREFETCH_MAX_AGE = 30  # Prefetched state older than this is left out of the prompt
+PREFETCH_MAX_CHARS = 1500  # Per-tool cap on the state injected into the prompt
+
+
+@dataclass
+class PrefetchedState:
+    """Result of a prefetch tool call with the time it was fetched."""
+
+    text: str
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+def compact_text(text: str, max_chars: int = PREFETCH_MAX_CHARS) -> str:
+    """Strip formatting whitespace from a tool result and cap its length.
+
+    Args:
+        text: Raw tool result text
+        max_chars: Maximum length of the returned text
+
+    Returns:
+        Compact text, with JSON re-serialized without indentation
+    """
+    try:
+        text = json.dumps(json.loads(text), separators=(",", ":"))
+    except ValueError:
+        text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars] + "...(truncated)"
+    return text
+
+
+def resolve_tool(agent, available_tools: List[str], server: str, tool: str) -> Optional[str]:
+    """Find the name under which the agent exposes a server's tool.
+
+    Args:
+        agent: The connected agent
+        available_tools: Names of the tools exposed to the agent
+        server: Name of the MCP server providing the tool
+        tool: Name of the tool on that server
+
+    Returns:
+        The namespaced tool name, or None if the agent does not have the tool
+    """
+    # The aggregator knows the exact namespaced name of every server tool
+    for namespaced in getattr(agent, "_server_to_tool_map", {}).get(server, []):
+        if namespaced.tool.name == tool:
+            return namespaced.namespaced_tool_name
+
+    # mcp-agent joins server and tool with "-" (0.0.14) or "_" (earlier versions)
+    for name in (f"{server}-{tool}", f"{server}_{tool}"):
+        if name in available_tools:
+            return name
+    return None
+
+
+class StatePrefetcher:
+    """Fetches the ship status ahead of each turn.
+
+    Saves the LLM a tool-call round-trip at the start of most turns by
+    injecting a fresh state summary into the prompt.
+    """
+
+    def __init__(self, agent, available_tools: List[str]):
+        """Resolve the prefetch tools against the tools the agent has.
+
+        Args:
+            agent: The connected agent used to call tools
+            available_tools: Names of the tools exposed to the agent
+        """
+        self.agent = agent
+        self.tools: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self.state: Dict[str, PrefetchedState] = {}
+
+        for label, (server, tool, arguments) in PREFETCH_TOOLS.items():
+            name = resolve_tool(agent, available_tools, server, tool)
+            if name:
+                self.tools[label] = (name, arguments)
+            else:
+                logger.warning(f"Prefetch tool {tool} of server {server} not available, skipping {label}")
+        if not self.tools:
+            logger.error("No prefetch tools available; turns will start without prefetched state")
+
+    async def _fetch(self, label: str) -> None:
+        name, arguments = self.tools[label]
+        try:
+            result = await asyncio.wait_for(
+                self.agent.call_tool(name, arguments), timeout=PREFETCH_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Prefetch of {label} failed: {e}")
+            return
+
+        if result.isError:
+            logger.warning(f"Prefetch of {label} returned an error")
+            return
+        text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+        self.state[label] = PrefetchedState(text=text, fetched_at=time.monotonic())
+
+    async def refresh(self, max_age: float = 0) -> None:
+        """Fetch the prefetch tools concurrently.
+
+        Args:
+            max_age: State younger than this many seconds is not fetched again
+        """
+        stale = [
+            label for label in self.tools
+            if label not in self.state or self.state[label].age > max_age
+        ]
+        await asyncio.gather(*(self._fetch(label) for label in stale))
+
+    async def sleep_and_refresh(self, delay: float) -> None:
+        """Sleep until the next turn, refreshing state just before it starts.
+
+        Args:
+            delay: Seconds until the next turn
+        """
+        lead = min(PREFETCH_LEAD, delay)
+        await asyncio.sleep(delay - lead)
+        await asyncio.gather(asyncio.sleep(lead), self.refresh(max_age=PREFETCH_LEAD))
+
+    def get(self, label: str) -> Optional[PrefetchedState]:
+        """Return prefetched state if it is still fresh."""
+        state = self.state.get(label)
+        if state is None or state.age > PREFETCH_MAX_AGE:
+            return None
+        return state
+
+    def summary(self) -> str:
+        """Compact summary of the fresh prefetched state for the prompt."""
+        sections = []
+        for label in self.tools:
+            state = self.get(label)
+            if state:
+                sections.append(
+                    f"{label} (fetched {state.age:.0f}s ago): {compact_text(state.text)}"
+                )
+        return "\n".join(sections)
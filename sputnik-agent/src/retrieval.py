@@ -0,0 +1,133 @@
+"""Retrieval index over the agent's move journal."""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_$.]+")
+
+# Words that carry no signal about the game state
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in is it its my of on "
+    "or so that the then this to was we will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms.
+
+    Numbers and identifiers such as planet IDs, coordinates and token tickers
+    are kept as single terms so that they can be matched exactly.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        The list of terms, in order of appearance
+    """
+    terms = []
+    for term in TOKEN_PATTERN.findall(text.lower()):
+        term = term.strip(".")
+        if term and term not in STOPWORDS:
+            terms.append(term)
+    return terms
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of LLM tokens in a text (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class MoveIndex:
+    """Incremental BM25 index over past moves.
+
+    Each move is indexed once when it is added, so keeping the index up to date
+    costs one pass over the new move per turn regardless of game length.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an empty index.
+
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.moves: List[str] = []
+        self._term_freqs: List[Counter] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def add(self, text: str) -> None:
+        """Add the next move to the index.
+
+        Args:
+            text: The full text of the move
+        """
+        move_id = len(self.moves)
+        term_freqs = Counter(tokenize(text))
+        self.moves.append(text)
+        self._term_freqs.append(term_freqs)
+        self._lengths.append(sum(term_freqs.values()))
+        self._total_length += self._lengths[-1]
+        for term in term_freqs:
+            self._postings[term].append(move_id)
+
+    def search(self, query: str, k: int, exclude_last: int = 0) -> List[Tuple[int, float]]:
+        """Find the moves most relevant to a query.
+
+        Args:
+            query: Text describing the current situation
+            k: Maximum number of moves to return
+            exclude_last: Number of most recent moves to leave out of the results
+
+        Returns:
+            (move index, score) pairs, best match first
+        """
+        searchable = len(self.moves) - exclude_last
+        if searchable <= 0 or k <= 0:
+            return []
+
+        avg_length = self._total_length / len(self.moves) or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.moves) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for move_id in postings:
+                if move_id >= searchable:
+                    break
+                tf = self._term_freqs[move_id][term]
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[move_id] / avg_length)
+                scores[move_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def select(self, query: str, k: int, token_budget: int, exclude_last: int = 0) -> List[int]:
+        """Pick relevant moves that fit within a token budget.
+
+        Args:
+            query: Text describing the current situation
+            k: Maximum number of moves to return
+            token_budget: Maximum estimated tokens of the selected moves
+            exclude_last: Number of most recent moves to leave out of the results
+
+        Returns:
+            Indexes of the selected moves, in chronological order
+        """
+        selected = []
+        used = 0
+        for move_id, _ in self.search(query, k, exclude_last):
+            cost = estimate_tokens(self.moves[move_id])
+            if used + cost > token_budget:
+                continue
+            selected.append(move_id)
+            used += cost
+        return sorted(selected)
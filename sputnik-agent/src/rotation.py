@@ -0,0 +1,23 @@
+"""Size-based rotation of the append-only files in the logs directory."""
+
+import datetime
+import gzip
+import shutil
+from pathlib import Path
+
+
+def rotate_to_gzip(path: Path) -> Path:
+    """Compress a file to <stem>-<timestamp><suffix>.gz next to it and remove it.
+
+    Args:
+        path: File to rotate
+
+    Returns:
+        Path of the compressed file
+    """
+    stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    rotated = path.with_name(f"{path.stem}-{stamp}{path.suffix}.gz")
+    with open(path, "rb") as src, gzip.open(rotated, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    path.unlink()
+    return rotated
@@ -0,0 +1,154 @@
+"""Structured per-move records of agent runs, and a CLI to query them.
+
+Each move is appended as one JSON line to logs/moves.jsonl. When the file
+exceeds MAX_BYTES it is compressed to logs/moves-<timestamp>.jsonl.gz, so
+records from many runs accumulate without any file growing unbounded.
+
+Query all runs in the logs directory with:
+
+    python -m src.runlog
+    python -m src.runlog --run <run_id> logs/moves-*.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .rotation import rotate_to_gzip
+from .tracing import percentile
+
+RECORD_DIR = "logs"
+RECORD_FILE = "moves.jsonl"
+MAX_BYTES = 5 * 1024 * 1024  # Rotate the record file beyond this size
+
+
+class MoveRecordWriter:
+    """Appends move records to a JSON lines file with size-based rotation."""
+
+    def __init__(self, directory: str = RECORD_DIR, max_bytes: int = MAX_BYTES):
+        """Initialize the writer.
+
+        Args:
+            directory: Directory holding the current and rotated record files
+            max_bytes: Size after which the current file is rotated
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / RECORD_FILE
+        self.max_bytes = max_bytes
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append a record, rotating the file first if it is too large.
+
+        Args:
+            record: JSON-serializable move record
+        """
+        self.directory.mkdir(exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+            rotate_to_gzip(self.path)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str, separators=(",", ":")) + "\n")
+
+
+def record_files(directory: str = RECORD_DIR) -> List[Path]:
+    """Rotated and current record files in a directory, oldest first."""
+    directory = Path(directory)
+    files = sorted(directory.glob(f"{Path(RECORD_FILE).stem}-*.jsonl.gz"))
+    if (directory / RECORD_FILE).exists():
+        files.append(directory / RECORD_FILE)
+    return files
+
+
+def read_records(paths: Iterable[Path]) -> Iterator[Dict[str, Any]]:
+    """Stream records from plain and gzip-compressed record files."""
+    for path in paths:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A partially written last line from an interrupted run
+                    continue
+
+
+def aggregate(records: Iterable[Dict[str, Any]], run_id: Optional[str] = None) -> str:
+    """Aggregate statistics over a stream of move records.
+
+    Only the numbers needed for the statistics are kept in memory, not the
+    records themselves.
+
+    Args:
+        records: Move records
+        run_id: Only include records of this run
+
+    Returns:
+        A text report
+    """
+    outcomes: Counter = Counter()
+    moves_per_run: Dict[str, int] = defaultdict(int)
+    durations: List[float] = []
+    phases: Dict[str, List[float]] = defaultdict(list)
+    tool_calls: Counter = Counter()
+    tool_failures: Counter = Counter()
+    tokens = 0
+    reconnects = 0
+
+    for record in records:
+        if run_id and record.get("run_id") != run_id:
+            continue
+        outcomes[record.get("outcome", "unknown")] += 1
+        moves_per_run[record.get("run_id", "unknown")] += 1
+        durations.append(record.get("duration_s", 0.0))
+        for phase, seconds in record.get("phases", {}).items():
+            phases[phase].append(seconds)
+        for tool in record.get("tools", []):
+            tool_calls[tool["name"]] += 1
+            if tool.get("is_error") or tool.get("timed_out"):
+                tool_failures[tool["name"]] += 1
+        tokens += record.get("prompt_tokens", 0) + record.get("completion_tokens", 0)
+        reconnects += bool(record.get("reconnect"))
+
+    total = sum(outcomes.values())
+    if not total:
+        return "No move records found"
+
+    durations.sort()
+    run_lengths = sorted(moves_per_run.values())
+    lines = [
+        f"runs: {len(moves_per_run)}  moves: {total}  tokens: {tokens}",
+        "outcomes: " + ", ".join(
+            f"{outcome} {count} ({count / total:.1%})" for outcome, count in outcomes.most_common()
+        ),
+        f"moves per run: p50 {percentile(run_lengths, 50):.0f}  max {run_lengths[-1]}  "
+        f"turns ending in a reconnect: {reconnects}",
+        f"move duration s: p50 {percentile(durations, 50):.2f}  p95 {percentile(durations, 95):.2f}",
+        "",
+        f"{'phase':<32}{'p50 s':>10}{'p95 s':>10}",
+    ]
+    for phase, values in sorted(phases.items(), key=lambda item: sum(item[1]), reverse=True):
+        values.sort()
+        lines.append(f"{phase:<32}{percentile(values, 50):>10.3f}{percentile(values, 95):>10.3f}")
+
+    if tool_calls:
+        lines += ["", f"{'tool':<40}{'calls':>8}{'failed':>8}"]
+        for name, count in tool_calls.most_common():
+            lines.append(f"{name:<40}{count:>8}{tool_failures[name]:>8}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Aggregate statistics over agent move records")
+    parser.add_argument("files", nargs="*", help=f"Record files (default: all files in {RECORD_DIR}/)")
+    parser.add_argument("--run", help="Only include moves of this run ID")
+    args = parser.parse_args(argv)
+
+    paths = [Path(f) for f in args.files] or record_files()
+    print(aggregate(read_records(paths), run_id=args.run))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,157 @@
+"""Adaptive scheduling of agent turns and shared LLM budgets."""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+logger = logging.getLogger("sputnik.scheduler")
+
+MIN_TURN_DELAY = 1  # Seconds; the shortest pause between turns
+IDLE_TURN_DELAY = 3  # Seconds between turns while the ship is idle and a decision is due
+DEFAULT_TURN_DELAY = 10  # Seconds between turns when nothing better is known
+MAX_TURN_DELAY = 120  # Seconds; re-check at least this often, even mid-flight
+ARRIVAL_MARGIN = 2  # Seconds added to a predicted arrival
+ERROR_BACKOFF_MAX = 60  # Seconds; cap on the backoff after failed turns
+SHIP_SPEED = 24.33  # Units per second; the server default, used when velocity is not reported
+
+LLM_MAX_CONCURRENCY = 4  # Concurrent LLM calls allowed per process
+LLM_TOKENS_PER_MINUTE = 200000  # Token rate shared by all agents in the process
+LLM_EXPECTED_COMPLETION_TOKENS = 2000  # Budgeted for the completion of each call
+
+
+def predict_arrival(ship_status: str) -> Optional[float]:
+    """Predict the seconds until the ship reaches its destination.
+
+    Args:
+        ship_status: get_spaceship_state result (JSON text)
+
+    Returns:
+        Seconds until arrival, 0 if the ship is idle, or None if unknown
+    """
+    try:
+        state = json.loads(ship_status)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(state, dict) or "is_moving" not in state:
+        return None
+    if not state["is_moving"]:
+        return 0.0
+
+    try:
+        position = [state["position"][axis] for axis in "xyz"]
+        destination = [state["destination"][axis] for axis in "xyz"]
+        speed = math.sqrt(sum(state["velocity"][axis] ** 2 for axis in "xyz"))
+    except (KeyError, TypeError):
+        return None
+    if speed <= 0:
+        speed = SHIP_SPEED
+    return math.dist(position, destination) / speed
+
+
+class TurnScheduler:
+    """Decides when the next turn should start.
+
+    Turns are held back while the ship is in flight (until its predicted
+    arrival), fire right away once the ship is idle (e.g. to retry a move that
+    was rejected with a 409 while it was still flying), and back off
+    exponentially after timeouts and errors.
+    """
+
+    def __init__(self):
+        self.consecutive_failures = 0
+
+    def record_outcome(self, outcome: str) -> None:
+        """Record how the last turn ended.
+
+        Args:
+            outcome: "ok", "timeout" or "error"
+        """
+        if outcome == "ok":
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+
+    def next_delay(self, ship_status: Optional[str] = None) -> float:
+        """Seconds to wait before the next turn.
+
+        Args:
+            ship_status: Latest prefetched get_spaceship_state result, if any
+
+        Returns:
+            The delay, between MIN_TURN_DELAY and MAX_TURN_DELAY
+        """
+        if self.consecutive_failures:
+            delay = min(DEFAULT_TURN_DELAY * 2 ** (self.consecutive_failures - 1), ERROR_BACKOFF_MAX)
+            reason = f"{self.consecutive_failures} failed turn(s)"
+        else:
+            eta = predict_arrival(ship_status) if ship_status else None
+            if eta is None:
+                delay, reason = DEFAULT_TURN_DELAY, "no ship status"
+            elif eta > 0:
+                delay, reason = eta + ARRIVAL_MARGIN, f"ship arriving in {eta:.0f}s"
+            else:
+                delay, reason = IDLE_TURN_DELAY, "ship idle"
+
+        delay = max(MIN_TURN_DELAY, min(delay, MAX_TURN_DELAY))
+        logger.info(f"Next turn in {delay:.0f}s ({reason})")
+        return delay
+
+
+class LLMBudget:
+    """Concurrency limit and token-rate budget for LLM calls.
+
+    A single instance is shared by every agent running in the process, so
+    several agents cannot exceed the provider's rate limits together.
+    """
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int):
+        """Initialize the budget.
+
+        Args:
+            max_concurrency: Maximum LLM calls in flight at once
+            tokens_per_minute: Sustained token rate across all calls
+        """
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._capacity = float(tokens_per_minute)
+        self._rate = tokens_per_minute / 60.0
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def _take(self, tokens: int) -> None:
+        tokens = min(tokens, self._capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= tokens
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the budget once the actual token usage of a call is known."""
+        self._refill()
+        self._tokens = min(self._capacity, self._tokens + estimated - actual)
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int):
+        """Wait for a concurrency slot and enough token budget for a call.
+
+        Args:
+            estimated_tokens: Expected tokens (prompt and completion) of the call
+        """
+        async with self._semaphore:
+            await self._take(estimated_tokens)
+            yield
+
+
+# Shared by all agents in this process
+llm_budget = LLMBudget(LLM_MAX_CONCURRENCY, LLM_TOKENS_PER_MINUTE)
@@ -0,0 +1,235 @@
+"""Span tracing and sampling profiler for the agent loop.
+
+Spans are written to a Chrome trace file (open it in chrome://tracing or
+https://ui.perfetto.dev), compressed to logs/trace-<timestamp>.json.gz once it
+exceeds MAX_BYTES. Print a per-phase summary of a trace with:
+
+    python -m src.tracing logs/trace.json
+"""
+
+import asyncio
+import gzip
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .rotation import rotate_to_gzip
+
+TRACE_FILE = "logs/trace.json"
+MAX_BYTES = 20 * 1024 * 1024  # Rotate the trace file beyond this size
+PROFILE_FILE = "logs/profile.folded"
+PROFILE_INTERVAL = 0.01  # Seconds between profiler samples
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Values in ascending order
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values) / 100) - 1))
+    return sorted_values[rank]
+
+
+class Tracer:
+    """Records timed spans as Chrome trace events.
+
+    The file uses the JSON array format without the closing bracket, which
+    trace viewers accept, so events can be appended across runs without
+    rewriting the file.
+    """
+
+    def __init__(self, path: str = TRACE_FILE, enabled: bool = True, max_bytes: int = MAX_BYTES):
+        """Initialize the tracer.
+
+        Args:
+            path: Trace file to append events to
+            enabled: When False, spans are still timed for pop_phases but nothing is written
+            max_bytes: Size after which the trace file is rotated on flush
+        """
+        self.path = Path(path)
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._file = None
+        self._pid = os.getpid()
+        self._task_ids: Dict[int, int] = {}
+        self._phase_seconds: Dict[str, float] = defaultdict(float)
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(exist_ok=True)
+            is_new = not self.path.exists() or self.path.stat().st_size == 0
+            self._file = open(self.path, "a", encoding="utf-8")
+            if is_new:
+                self._file.write("[\n")
+        return self._file
+
+    def _tid(self) -> int:
+        # Spans of concurrent tasks go on separate tracks so they nest properly
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            return 0
+        return self._task_ids.setdefault(id(task), len(self._task_ids) + 1)
+
+    @contextmanager
+    def span(self, name: str, category: str = "agent", **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block of code as a span.
+
+        Args:
+            name: Span name, used as the phase in summaries
+            category: Trace event category
+            **args: Attributes recorded with the span
+
+        Yields:
+            The span attributes, which the block may add to (e.g. token counts)
+        """
+        started = time.perf_counter()
+        if not self.enabled:
+            try:
+                yield args
+            finally:
+                self._phase_seconds[name] += time.perf_counter() - started
+            return
+
+        tid = self._tid()
+        start_us = time.time_ns() // 1000
+        try:
+            yield args
+        finally:
+            self._phase_seconds[name] += time.perf_counter() - started
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start_us,
+                "dur": round((time.perf_counter() - started) * 1e6),
+                "pid": self._pid,
+                "tid": tid,
+                "args": args,
+            }
+            self._open().write(json.dumps(event, default=str, separators=(",", ":")) + ",\n")
+
+    def pop_phases(self) -> Dict[str, float]:
+        """Seconds spent per span name since the last call, also when disabled."""
+        phases = {name: round(seconds, 6) for name, seconds in self._phase_seconds.items()}
+        self._phase_seconds.clear()
+        return phases
+
+    def flush(self) -> None:
+        """Flush buffered events to disk, rotating the trace file if it is too large."""
+        if self._file is not None:
+            self._file.flush()
+            # Forget finished tasks so the track map stays small
+            self._task_ids.clear()
+            if self.path.stat().st_size >= self.max_bytes:
+                self._file.close()
+                self._file = None
+                rotate_to_gzip(self.path)
+
+
+class SamplingProfiler:
+    """Samples the main thread's stack at a fixed interval.
+
+    Writes stacks in the folded format used by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, path: str = PROFILE_FILE, interval: float = PROFILE_INTERVAL):
+        self.path = Path(path)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._thread_id = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and write the collected stacks."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.path.parent.mkdir(exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the events of a plain or rotated (gzip) trace file written by Tracer."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if line in ("", "[", "]"):
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+
+
+def summarize(path: str) -> str:
+    """Per-phase duration and token summary of a trace file.
+
+    Args:
+        path: Trace file to summarize
+
+    Returns:
+        A text table with count, p50, p95 and total duration per span name,
+        and the tokens the LLM API reported for the spans' completions
+    """
+    durations: Dict[str, List[float]] = defaultdict(list)
+    tokens: Counter = Counter()
+    for event in read_events(path):
+        if event.get("ph") != "X":
+            continue
+        durations[event["name"]].append(event["dur"] / 1e6)
+        for key in ("prompt_tokens", "completion_tokens"):
+            tokens[event["name"]] += event.get("args", {}).get(key, 0)
+
+    lines = [f"{'phase':<32}{'count':>8}{'p50 s':>10}{'p95 s':>10}{'total s':>10}{'tokens':>10}"]
+    by_total = sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True)
+    for name, values in by_total:
+        values.sort()
+        lines.append(
+            f"{name:<32}{len(values):>8}{percentile(values, 50):>10.3f}"
+            f"{percentile(values, 95):>10.3f}{sum(values):>10.1f}{tokens[name]:>10}"
+        )
+    return "\n".join(lines)
+
+
+# Shared by the agent loop and tool calls; disable with SPUTNIK_TRACE=0
+tracer = Tracer(enabled=os.getenv("SPUTNIK_TRACE", "1") != "0")
+
+
+if __name__ == "__main__":
+    print(summarize(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE))
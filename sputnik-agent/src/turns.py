@@ -0,0 +1,208 @@
+"""Tool-level timeouts and checkpointed, resumable agent turns."""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Dict, List, Optional
+
+from mcp.types import CallToolResult, TextContent
+from mcp_agent.agents.agent import Agent
+
+from .tracing import tracer
+
+logger = logging.getLogger("sputnik.turns")
+
+TOOL_MAX_WAIT = 30  # Default seconds allowed for a single tool call
+TOOL_TIME_BUDGET = 960  # Seconds of tool execution allowed per turn; fits one maximal wait call
+TURN_POLL_INTERVAL = 0.5  # Seconds between budget checks while a turn runs
+RESULT_MAX_CHARS = 500  # Tool results kept in a checkpoint are cut to this length
+
+
+class TurnBudgetExceeded(asyncio.TimeoutError):
+    """Raised when a turn runs out of thinking or tool time."""
+
+
+@dataclass
+class ToolCallRecord:
+    """A tool call completed (or abandoned) during a turn."""
+
+    name: str
+    arguments: Dict[str, Any]
+    result: str
+    is_error: bool
+    duration: float
+    timed_out: bool = False
+
+    def describe(self) -> str:
+        status = "TIMED OUT" if self.timed_out else "ERROR" if self.is_error else "OK"
+        return (
+            f"{self.name}({json.dumps(self.arguments, separators=(',', ':'))}) "
+            f"[{status}, {self.duration:.1f}s] -> {self.result}"
+        )
+
+
+@dataclass
+class TurnCheckpoint:
+    """Tool calls made so far in the current turn."""
+
+    calls: List[ToolCallRecord] = field(default_factory=list)
+    _completed_seconds: float = 0.0
+    _active: Dict[object, float] = field(default_factory=dict)
+
+    def start_call(self) -> object:
+        """Mark a tool call as running; returns a token for finish_call."""
+        token = object()
+        self._active[token] = time.monotonic()
+        return token
+
+    def finish_call(self, token: object, record: ToolCallRecord) -> None:
+        """Record a finished tool call."""
+        self._completed_seconds += time.monotonic() - self._active.pop(token)
+        self.calls.append(record)
+
+    def abandon_call(self, token: object, record: ToolCallRecord) -> None:
+        """Record a tool call that was cancelled with its turn."""
+        self.finish_call(token, record)
+
+    def tool_seconds(self) -> float:
+        """Seconds spent in tool calls this turn, including calls still running."""
+        now = time.monotonic()
+        return self._completed_seconds + sum(now - started for started in self._active.values())
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        return [asdict(call) for call in self.calls]
+
+
+class CheckpointingAgent(Agent):
+    """Agent that times out individual tool calls and checkpoints their results.
+
+    A slow tool only fails its own call (the model sees an error result and can
+    carry on) instead of the whole turn being cancelled. Calls made during a
+    turn are recorded so that their results survive a turn that times out.
+    """
+
+    def __init__(self, *args, tool_timeouts: Optional[Dict[str, float]] = None, **kwargs):
+        """Initialize the agent.
+
+        Args:
+            tool_timeouts: Per-tool timeouts in seconds, overriding TOOL_MAX_WAIT
+        """
+        super().__init__(*args, **kwargs)
+        self.tool_timeouts = tool_timeouts or {}
+        self.checkpoint: Optional[TurnCheckpoint] = None
+
+    def _timeout_for(self, name: str) -> float:
+        for tool, timeout in self.tool_timeouts.items():
+            # Server tools are namespaced as <server>-<tool> (older mcp-agent: <server>_<tool>)
+            if name == tool or name.endswith((f"-{tool}", f"_{tool}")):
+                return timeout
+        return TOOL_MAX_WAIT
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, **kwargs) -> CallToolResult:
+        checkpoint = self.checkpoint
+        token = checkpoint.start_call() if checkpoint is not None else None
+        timeout = self._timeout_for(name)
+        started = time.monotonic()
+
+        timed_out = False
+        deadline = asyncio.timeout(timeout)
+        try:
+            with tracer.span(f"tool:{name}", category="tool"):
+                async with deadline:
+                    result = await super().call_tool(name, arguments, **kwargs)
+        except TimeoutError as e:
+            if not deadline.expired():
+                # Raised inside the tool (e.g. an HTTP or MCP read timeout), not by our limit
+                logger.warning(f"Tool {name} failed with a timeout of its own: {e!r}")
+                result = CallToolResult(
+                    isError=True,
+                    content=[TextContent(type="text", text=f"Tool {name} failed: {e!r}")]
+                )
+            else:
+                logger.warning(f"Tool {name} timed out after {timeout}s")
+                timed_out = True
+                result = CallToolResult(
+                    isError=True,
+                    content=[TextContent(
+                        type="text",
+                        text=f"Tool {name} timed out after {timeout} seconds. "
+                             "It may still complete; check the game state before retrying."
+                    )]
+                )
+        except BaseException:
+            if token is not None:
+                # The request may already have reached the server (e.g. a move),
+                # so keep the call for the resume prompt
+                checkpoint.abandon_call(token, ToolCallRecord(
+                    name=name,
+                    arguments=arguments or {},
+                    result="Cancelled with the turn before a result arrived. "
+                           "It may have completed; check the game state before retrying.",
+                    is_error=True,
+                    duration=time.monotonic() - started,
+                    timed_out=True,
+                ))
+            raise
+
+        if checkpoint is not None:
+            text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+            checkpoint.finish_call(token, ToolCallRecord(
+                name=name,
+                arguments=arguments or {},
+                result=text[:RESULT_MAX_CHARS],
+                is_error=bool(result.isError),
+                duration=time.monotonic() - started,
+                timed_out=timed_out,
+            ))
+        return result
+
+
+async def run_turn(
+    agent: CheckpointingAgent,
+    generate: Awaitable[str],
+    checkpoint: TurnCheckpoint,
+    thinking_budget: float,
+    tool_budget: float = TOOL_TIME_BUDGET,
+) -> str:
+    """Run one LLM turn with separate thinking and tool-time budgets.
+
+    The turn is cancelled when the model time (wall time minus time spent in
+    tool calls) exceeds the thinking budget or tool calls exceed the tool
+    budget. The checkpoint keeps the calls completed so far, also
+    when the turn is cancelled.
+
+    Args:
+        agent: The agent whose tool calls are checkpointed
+        generate: The LLM generation to run
+        checkpoint: Receives the tool calls made during the turn
+        thinking_budget: Seconds of model time allowed
+        tool_budget: Seconds of tool execution allowed
+
+    Returns:
+        The LLM response
+
+    Raises:
+        TurnBudgetExceeded: If either budget runs out
+    """
+    agent.checkpoint = checkpoint
+    started = time.monotonic()
+    task = asyncio.ensure_future(generate)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=TURN_POLL_INTERVAL)
+            if done:
+                return task.result()
+
+            tool_seconds = checkpoint.tool_seconds()
+            thinking_seconds = time.monotonic() - started - tool_seconds
+            if thinking_seconds > thinking_budget:
+                raise TurnBudgetExceeded(f"model time exceeded {thinking_budget}s")
+            if tool_seconds > tool_budget:
+                raise TurnBudgetExceeded(f"tool time exceeded {tool_budget}s")
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        agent.checkpoint = None
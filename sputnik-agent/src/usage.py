@@ -0,0 +1,92 @@
+"""Token usage reported by the LLM provider for every completion of a turn."""
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from mcp_agent.workflows.llm.augmented_llm_openai import OpenAIAugmentedLLM
+
+from .retrieval import estimate_tokens
+from .scheduler import LLM_EXPECTED_COMPLETION_TOKENS, llm_budget
+from .tracing import tracer
+
+
+@dataclass
+class TokenUsage:
+    """Tokens used by the completions of one or more LLM calls."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    completions: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, usage: Any) -> None:
+        """Add the usage of a chat completion response."""
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        self.completions += 1
+
+
+class UsageRecordingExecutor:
+    """Wraps an executor and records the usage of the completions it runs.
+
+    A turn's generate_str makes one completion per tool-call round; the
+    responses never leave OpenAIAugmentedLLM.generate, so their usage is
+    picked up where the executor hands them back. Each completion is traced
+    as an llm_completion span with its reported token counts.
+
+    Each completion also takes its own slot and token budget from the shared
+    llm_budget and settles it with the reported usage, so the budget is not
+    held while the turn's tool calls run.
+    """
+
+    def __init__(self, executor, usage: TokenUsage):
+        self._executor = executor
+        self.usage = usage
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._executor, name)
+
+    async def execute(self, *tasks, **kwargs):
+        if "messages" not in kwargs:
+            # Tool calls; their time is traced by the agent
+            return await self._executor.execute(*tasks, **kwargs)
+
+        request = json.dumps([kwargs["messages"], kwargs.get("tools")], default=str)
+        estimated = estimate_tokens(request) + LLM_EXPECTED_COMPLETION_TOKENS
+        used = estimated
+        with tracer.span("llm_completion", category="llm", model=kwargs.get("model")) as span:
+            # Shared with any other agents in this process
+            async with llm_budget.acquire(estimated):
+                try:
+                    results = await self._executor.execute(*tasks, **kwargs)
+                    for result in results:
+                        usage = getattr(result, "usage", None)
+                        if usage is not None:
+                            self.usage.add(usage)
+                            span["prompt_tokens"] = getattr(usage, "prompt_tokens", 0) or 0
+                            span["completion_tokens"] = getattr(usage, "completion_tokens", 0) or 0
+                            used = span["prompt_tokens"] + span["completion_tokens"]
+                finally:
+                    llm_budget.settle(estimated, used)
+        return results
+
+
+class UsageTrackingLLM(OpenAIAugmentedLLM):
+    """OpenAI LLM that accumulates the token usage of its completions."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.usage = TokenUsage()
+        self.executor = UsageRecordingExecutor(self.executor, self.usage)
+
+    def pop_usage(self) -> TokenUsage:
+        """Usage since the last call, e.g. of the turn that just ended."""
+        usage = TokenUsage(
+            self.usage.prompt_tokens, self.usage.completion_tokens, self.usage.completions
+        )
+        self.usage.prompt_tokens = self.usage.completion_tokens = self.usage.completions = 0
+        return usage
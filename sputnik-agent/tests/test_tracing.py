@@ -0,0 +1,78 @@
+"""Tests for the trace file reader and summary."""
+
+import pytest
+
+from src.rotation import rotate_to_gzip
+from src.tracing import Tracer, percentile, read_events, summarize
+
+
+@pytest.mark.parametrize(
+    "n, q, expected",
+    [
+        (10, 50, 5),
+        (100, 95, 95),
+        (20, 95, 19),
+        (20, 100, 20),
+        (100, 7, 7),
+        (1, 50, 1),
+        (3, 0, 1),
+    ],
+)
+def test_percentile_is_nearest_rank(n, q, expected):
+    assert percentile([float(i) for i in range(1, n + 1)], q) == expected
+
+
+def test_percentile_of_empty_list():
+    assert percentile([], 50) == 0.0
+
+
+def write_trace(path, spans):
+    tracer = Tracer(str(path))
+    for name, args in spans:
+        with tracer.span(name, **args):
+            pass
+    tracer.flush()
+    return tracer
+
+
+def test_read_events_of_plain_and_rotated_files(tmp_path):
+    path = tmp_path / "trace.json"
+    write_trace(path, [("turn", {"move_number": 1}), ("llm_completion", {"prompt_tokens": 10})])
+    rotated = rotate_to_gzip(path)
+    write_trace(path, [("turn", {"move_number": 2})])
+
+    assert [e["args"]["move_number"] for e in read_events(str(path))] == [2]
+    assert [e["name"] for e in read_events(str(rotated))] == ["turn", "llm_completion"]
+
+
+def test_read_events_skips_partial_last_line(tmp_path):
+    path = tmp_path / "trace.json"
+    write_trace(path, [("turn", {})])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"name":"tu')
+    assert [e["name"] for e in read_events(str(path))] == ["turn"]
+
+
+def test_tracer_rotates_when_too_large(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path), max_bytes=1)
+    with tracer.span("turn"):
+        pass
+    tracer.flush()
+    assert not path.exists()
+    assert len(list(tmp_path.glob("trace-*.json.gz"))) == 1
+
+
+def test_summarize_counts_spans_and_reported_tokens(tmp_path):
+    path = tmp_path / "trace.json"
+    write_trace(path, [
+        ("llm_completion", {"prompt_tokens": 100, "completion_tokens": 20}),
+        ("llm_completion", {"prompt_tokens": 50, "completion_tokens": 5}),
+        ("prompt_build", {"estimated_tokens": 999}),
+    ])
+    rows = {line.split()[0]: line.split() for line in summarize(str(path)).splitlines()[1:]}
+
+    assert rows["llm_completion"][1] == "2"
+    assert rows["llm_completion"][-1] == "175"
+    # Estimates are not reported usage
+    assert rows["prompt_build"][-1] == "0"
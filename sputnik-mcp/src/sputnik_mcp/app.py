@@ -8,6 +8,8 @@ import sys
 
 from fastmcp import FastMCP
 
+from .cache import create_cache, StateCache
+from .fleet import create_fleet_index, FleetIndex
 from .client import create_client, SputnikAPIClient
 
 # Configure logging
@@ -21,6 +23,13 @@ logger = logging.getLogger("sputnik_mcp")
 # API client instance that will be initialized during startup
 api_client = None
 
+# Shared state cache, created on first use and kept for the life of the process
+# so that it outlives individual client sessions
+state_cache = None
+
+# Index of all known ship positions, stored alongside the state cache
+fleet_index = None
+
 
 def get_api_client() -> SputnikAPIClient:
     """
@@ -37,6 +46,32 @@ def get_api_client() -> SputnikAPIClient:
     return api_client
 
 
+def get_state_cache() -> StateCache:
+    """
+    Get the process-wide state cache instance, creating it on first use.
+    
+    Returns:
+        The state cache instance
+    """
+    global state_cache
+    if state_cache is None:
+        state_cache = create_cache()
+    return state_cache
+
+
+def get_fleet_index() -> FleetIndex:
+    """
+    Get the process-wide fleet index, creating it on first use.
+    
+    Returns:
+        The fleet index instance
+    """
+    global fleet_index
+    if fleet_index is None:
+        fleet_index = create_fleet_index(get_state_cache())
+    return fleet_index
+
+
 @asynccontextmanager
 async def lifespan(app: FastMCP):
     """
@@ -67,4 +102,5 @@ app = FastMCP(
 )
 
 # Import tools - these will register automatically via the decorators once imported
-from .tools.spaceship import move_spaceship, get_spaceship_state  # noqa 
\ No newline at end of file
+from .tools.spaceship import move_spaceship, get_spaceship_state  # noqa
+from .tools.fleet import ships_near, ships_targeting  # noqa 
\ No newline at end of file
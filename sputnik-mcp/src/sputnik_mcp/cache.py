@@ -0,0 +1,228 @@
+"""
+Shared state cache for the Sputnik MCP server
+
+Holds ship snapshots and route state so that every worker process behind the
+same port sees a consistent view. Uses Redis when MCP_CACHE_URL is configured
+and falls back to an in-process store otherwise.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("sputnik_mcp.cache")
+
+
+class StateCache:
+    """Base interface for the shared state cache"""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Store a value in the cache
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value to store
+            ttl: Optional time to live in seconds
+        """
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """
+        Remove a value from the cache
+
+        Args:
+            key: Cache key
+        """
+        raise NotImplementedError
+
+    async def update(
+        self,
+        key: str,
+        fn: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+        ttl: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Atomically replace a value with a function of its current value
+        
+        No other writer can change the value between reading it and storing
+        the new one. fn may be called more than once and must not have side
+        effects.
+        
+        Args:
+            key: Cache key
+            fn: Computes the new value from the current one (None if missing)
+            ttl: Optional time to live in seconds
+            
+        Returns:
+            The value that was stored
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release any resources held by the cache"""
+
+
+class MemoryStateCache(StateCache):
+    """In-process cache, only shared between requests of a single worker"""
+
+    # Expired entries are swept once the cache grows by this many keys
+    SWEEP_THRESHOLD = 1024
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], Dict[str, Any]]] = {}
+        self._sweep_at = self.SWEEP_THRESHOLD
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        self._sweep_at = len(self._data) + self.SWEEP_THRESHOLD
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        if len(self._data) >= self._sweep_at:
+            self._sweep()
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def update(
+        self,
+        key: str,
+        fn: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+        ttl: Optional[float] = None
+    ) -> Dict[str, Any]:
+        # Atomic within the event loop, since nothing is awaited in between
+        value = fn(await self.get(key))
+        await self.set(key, value, ttl=ttl)
+        return value
+
+
+class RedisStateCache(StateCache):
+    """Redis-backed cache shared by all worker processes"""
+
+    def __init__(self, url: str, prefix: str = "sputnik_mcp:"):
+        """
+        Initialize the Redis cache
+
+        Args:
+            url: Redis connection URL (e.g., redis://localhost:6379/0)
+            prefix: Prefix applied to every key
+        """
+        # Imported lazily so redis stays an optional dependency
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    @property
+    def client(self):
+        """The underlying redis.asyncio client, for structures beyond key-value"""
+        return self._redis
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self._redis.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        px = int(ttl * 1000) if ttl else None
+        await self._redis.set(self.prefix + key, json.dumps(value), px=px)
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self.prefix + key)
+
+    async def update(
+        self,
+        key: str,
+        fn: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+        ttl: Optional[float] = None
+    ) -> Dict[str, Any]:
+        from redis.exceptions import WatchError
+
+        full_key = self.prefix + key
+        px = int(ttl * 1000) if ttl else None
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # The transaction fails if another worker writes the key after WATCH
+                    await pipe.watch(full_key)
+                    raw = await pipe.get(full_key)
+                    value = fn(json.loads(raw) if raw is not None else None)
+                    pipe.multi()
+                    pipe.set(full_key, json.dumps(value), px=px)
+                    await pipe.execute()
+                    return value
+                except WatchError:
+                    continue
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def snapshot_key(sputnik_id: Optional[str]) -> str:
+    """Cache key for the latest status snapshot of a spaceship"""
+    return f"snapshot:{sputnik_id or 'default'}"
+
+
+def route_key(sputnik_id: Optional[str]) -> str:
+    """Cache key for the last route (move command) issued to a spaceship"""
+    return f"route:{sputnik_id or 'default'}"
+
+
+def version_key(sputnik_id: Optional[str], version: Optional[int] = None) -> str:
+    """Cache key for the latest versioned snapshot, or for a specific past version"""
+    key = f"version:{sputnik_id or 'default'}"
+    return key if version is None else f"{key}:{version}"
+
+
+# Factory function to create a cache from environment variables
+def create_cache() -> StateCache:
+    """
+    Create a new state cache using environment variables
+
+    Returns:
+        RedisStateCache if MCP_CACHE_URL is set and redis is installed,
+        otherwise MemoryStateCache
+    """
+    cache_url = os.getenv("MCP_CACHE_URL")
+    if cache_url:
+        try:
+            cache = RedisStateCache(cache_url)
+            logger.info(f"Using Redis state cache at {cache_url}")
+            return cache
+        except ImportError:
+            logger.warning("MCP_CACHE_URL is set but the redis package is not installed. "
+                           "Install sputnik-mcp[workers] to share state between workers.")
+
+    if int(os.getenv("MCP_WORKERS", "1")) > 1:
+        logger.warning("Running multiple workers with an in-process cache. "
+                       "Snapshots will not be shared between workers.")
+    logger.info("Using in-process state cache")
+    return MemoryStateCache()
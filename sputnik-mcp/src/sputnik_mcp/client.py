@@ -31,15 +31,18 @@ class SputnikAPIClient:
         logger.info(f"Creating API client with base URL: {base_url}")
         self._client = httpx.AsyncClient(headers=self.headers, timeout=30.0)  # Increased timeout
     
-    async def get_status(self, sputnik_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_status(self, sputnik_id: Optional[str] = None, etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Get the current status of the spaceship
         
         Args:
             sputnik_id: Optional ID of the spaceship to get status for (for multiplayer mode)
+            etag: Optional ETag of a previously received status; makes the request conditional
             
         Returns:
-            Current spaceship status including position, velocity, etc.
+            Current spaceship status including position, velocity, etc. The ETag
+            of the status, if the API sent one, is included under "etag".
+            None if an etag was given and the status has not changed since.
         
         Raises:
             httpx.HTTPStatusError: If the API returns an error status
@@ -51,11 +54,17 @@ class SputnikAPIClient:
         if sputnik_id:
             params["uuid"] = sputnik_id
         
+        headers = {"If-None-Match": etag} if etag else None
+        
         logger.debug(f"Making GET request to {url} with params: {params}")
         try:
-            response = await self._client.get(url, params=params)
+            response = await self._client.get(url, params=params, headers=headers)
+            if response.status_code == 304:
+                logger.debug(f"Status of {sputnik_id or 'default'} spaceship not modified")
+                return None
             response.raise_for_status()
             data = response.json()
+            data["etag"] = response.headers.get("etag")
             logger.debug(f"Successfully received API response for {sputnik_id or 'default'} spaceship")
             return data
         except httpx.HTTPStatusError as e:
@@ -111,6 +120,30 @@ class SputnikAPIClient:
             logger.error(f"Unexpected error in move_to: {str(e)}", exc_info=True)
             raise
         
+    async def get_map(self) -> Dict[str, Any]:
+        """
+        Get the map configuration (planets and universe radius)
+        
+        Returns:
+            The map configuration
+            
+        Raises:
+            httpx.HTTPStatusError: If the API returns an error status
+        """
+        url = f"{self.base_url}/api/map"
+        
+        logger.debug(f"Making GET request to {url}")
+        try:
+            response = await self._client.get(url)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error {e.response.status_code} from Sputnik API: {e.response.text}")
+            raise
+        except httpx.RequestError as e:
+            logger.error(f"Request error when connecting to Sputnik API: {str(e)}")
+            raise
+        
     async def close(self) -> None:
         """Close the HTTP client"""
         logger.debug("Closing API client")
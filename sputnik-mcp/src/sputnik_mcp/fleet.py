@@ -0,0 +1,421 @@
+"""
+Sector-hashed index of the latest known positions of all spaceships
+
+Uses the same SECTOR_SIZE as the Sputnik server (see sectorUtils.ts) so that
+proximity queries only visit the sectors overlapping the query sphere. Like
+the state cache, the index is kept in Redis when MCP_CACHE_URL is configured,
+so that every worker answers from the snapshots seen by all workers, and in
+the worker process otherwise.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .cache import RedisStateCache, StateCache
+
+logger = logging.getLogger("sputnik_mcp.fleet")
+
+# Sector size in world units; must match the Sputnik server
+SECTOR_SIZE = 1000.0
+
+# Ships not seen for this many seconds are removed from the index
+EVICT_AGE = float(os.getenv("MCP_SHIP_EVICT_AGE", "3600"))
+
+# Seconds between sweeps for ships to evict
+EVICT_INTERVAL = 60.0
+
+Sector = Tuple[int, int, int]
+
+
+def position_to_sector(position: List[float]) -> Sector:
+    """Convert a position to sector coordinates"""
+    return (
+        math.floor(position[0] / SECTOR_SIZE),
+        math.floor(position[1] / SECTOR_SIZE),
+        math.floor(position[2] / SECTOR_SIZE)
+    )
+
+
+def sector_name(sector: Sector) -> str:
+    """String form of sector coordinates, used in cache keys"""
+    return f"{sector[0]}:{sector[1]}:{sector[2]}"
+
+
+def sectors_in_range(position: List[float], radius: float) -> List[Sector]:
+    """All sectors overlapping the bounding box of a sphere"""
+    low = position_to_sector([c - radius for c in position])
+    high = position_to_sector([c + radius for c in position])
+    return [
+        (sx, sy, sz)
+        for sx in range(low[0], high[0] + 1)
+        for sy in range(low[1], high[1] + 1)
+        for sz in range(low[2], high[2] + 1)
+    ]
+
+
+def sector_count(position: List[float], radius: float) -> int:
+    """Number of sectors sectors_in_range would return"""
+    low = position_to_sector([c - radius for c in position])
+    high = position_to_sector([c + radius for c in position])
+    return (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+
+
+@dataclass
+class ShipEntry:
+    """Latest known state of a spaceship"""
+    sputnik_id: str
+    position: List[float]
+    is_moving: bool
+    destination: Optional[List[float]]
+    target_planet: Optional[str]
+    updated_at: float
+
+    @property
+    def sector(self) -> Sector:
+        return position_to_sector(self.position)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+    def to_json(self) -> str:
+        return json.dumps({**asdict(self), "sector": sector_name(self.sector)})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ShipEntry":
+        data = json.loads(raw)
+        data.pop("sector", None)
+        return cls(**data)
+
+
+def _within(
+    entries: Iterable[ShipEntry],
+    position: List[float],
+    radius: float,
+    max_age: Optional[float],
+    exclude: Optional[str]
+) -> List[Tuple[ShipEntry, float]]:
+    """Filter candidate ships to those within the sphere, nearest first"""
+    now = time.time()
+    results = []
+    for entry in entries:
+        if entry.sputnik_id == exclude:
+            continue
+        if max_age is not None and now - entry.updated_at > max_age:
+            continue
+        distance = math.dist(position, entry.position)
+        if distance <= radius:
+            results.append((entry, distance))
+    results.sort(key=lambda item: item[1])
+    return results
+
+
+def _heading(entries: Iterable[ShipEntry], max_age: Optional[float]) -> List[ShipEntry]:
+    """Filter ships of a target set to those still flying, most recently updated first"""
+    now = time.time()
+    results = [
+        entry for entry in entries
+        if entry.is_moving and (max_age is None or now - entry.updated_at <= max_age)
+    ]
+    results.sort(key=lambda entry: entry.updated_at, reverse=True)
+    return results
+
+
+class FleetIndex:
+    """Base interface for the spatial index of ships by sector, plus a reverse index by target planet"""
+
+    def __init__(self):
+        self._evict_at = time.monotonic() + EVICT_INTERVAL
+
+    async def update(
+        self,
+        sputnik_id: str,
+        position: List[float],
+        is_moving: bool,
+        destination: Optional[List[float]] = None,
+        target_planet: Optional[str] = None,
+        updated_at: Optional[float] = None
+    ) -> None:
+        """
+        Record the latest state of a ship
+
+        Snapshots older than the one already recorded for the ship are ignored.
+
+        Args:
+            sputnik_id: ID of the ship
+            position: Current position
+            is_moving: Whether the ship is moving
+            destination: Destination if moving
+            target_planet: ID of the planet the ship is heading to, if known
+            updated_at: Time of the snapshot (defaults to now)
+        """
+        await self._store(ShipEntry(
+            sputnik_id=sputnik_id,
+            position=list(position),
+            is_moving=is_moving,
+            destination=list(destination) if destination else None,
+            target_planet=str(target_planet) if target_planet is not None else None,
+            updated_at=updated_at if updated_at is not None else time.time()
+        ))
+
+        if time.monotonic() >= self._evict_at:
+            self._evict_at = time.monotonic() + EVICT_INTERVAL
+            evicted = await self.evict(time.time() - EVICT_AGE)
+            if evicted:
+                logger.info(f"Evicted {evicted} ships not seen for {EVICT_AGE:.0f}s")
+
+    async def _store(self, entry: ShipEntry) -> None:
+        raise NotImplementedError
+
+    async def near(
+        self,
+        position: List[float],
+        radius: float,
+        max_age: Optional[float] = None,
+        exclude: Optional[str] = None
+    ) -> List[Tuple[ShipEntry, float]]:
+        """
+        Find ships within a radius of a position
+
+        Args:
+            position: Center of the query sphere
+            radius: Radius of the query sphere
+            max_age: Ignore ships whose last snapshot is older than this many seconds
+            exclude: ID of a ship to leave out (e.g. the querying ship)
+
+        Returns:
+            (ship, distance) pairs, nearest first
+        """
+        raise NotImplementedError
+
+    async def targeting(self, planet_id: str, max_age: Optional[float] = None) -> List[ShipEntry]:
+        """
+        Find ships flying to a planet
+
+        Args:
+            planet_id: ID of the planet
+            max_age: Ignore ships whose last snapshot is older than this many seconds
+
+        Returns:
+            The ships, most recently updated first
+        """
+        raise NotImplementedError
+
+    async def evict(self, older_than: float) -> int:
+        """
+        Remove ships whose last snapshot is older than a point in time
+
+        Args:
+            older_than: Unix time before which ships are removed
+
+        Returns:
+            Number of ships removed
+        """
+        raise NotImplementedError
+
+
+class MemoryFleetIndex(FleetIndex):
+    """In-process index, only fed from the snapshots of a single worker"""
+
+    def __init__(self):
+        super().__init__()
+        self.ships: Dict[str, ShipEntry] = {}
+        self._sectors: Dict[Sector, Set[str]] = defaultdict(set)
+        self._targets: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.ships)
+
+    def _remove(self, entry: ShipEntry) -> None:
+        del self.ships[entry.sputnik_id]
+        members = self._sectors.get(entry.sector)
+        if members is not None:
+            members.discard(entry.sputnik_id)
+            if not members:
+                del self._sectors[entry.sector]
+        if entry.target_planet is not None:
+            targeting = self._targets.get(entry.target_planet)
+            if targeting is not None:
+                targeting.discard(entry.sputnik_id)
+                if not targeting:
+                    del self._targets[entry.target_planet]
+
+    async def _store(self, entry: ShipEntry) -> None:
+        previous = self.ships.get(entry.sputnik_id)
+        if previous is not None:
+            if previous.updated_at > entry.updated_at:
+                return
+            self._remove(previous)
+
+        self.ships[entry.sputnik_id] = entry
+        self._sectors[entry.sector].add(entry.sputnik_id)
+        if entry.target_planet is not None:
+            self._targets[entry.target_planet].add(entry.sputnik_id)
+
+    async def near(
+        self,
+        position: List[float],
+        radius: float,
+        max_age: Optional[float] = None,
+        exclude: Optional[str] = None
+    ) -> List[Tuple[ShipEntry, float]]:
+        # For very large radii visiting every ship is cheaper than every sector
+        if sector_count(position, radius) > len(self._sectors):
+            candidates = self.ships.values()
+        else:
+            candidates = [
+                self.ships[sputnik_id]
+                for sector in sectors_in_range(position, radius)
+                for sputnik_id in self._sectors.get(sector, ())
+            ]
+        return _within(candidates, position, radius, max_age, exclude)
+
+    async def targeting(self, planet_id: str, max_age: Optional[float] = None) -> List[ShipEntry]:
+        return _heading(
+            (self.ships[sputnik_id] for sputnik_id in self._targets.get(str(planet_id), ())),
+            max_age
+        )
+
+    async def evict(self, older_than: float) -> int:
+        stale = [entry for entry in self.ships.values() if entry.updated_at < older_than]
+        for entry in stale:
+            self._remove(entry)
+        return len(stale)
+
+
+# Replaces a ship's entry and moves it between sector and target sets in one
+# step. An empty entry removes the ship. Entries newer than the given time are
+# left alone, so late or stale snapshots never replace newer ones.
+# ARGV: key prefix, ship ID, entry JSON, updated_at, sector, target planet
+STORE_SCRIPT = """
+local prefix, id = ARGV[1], ARGV[2]
+local ships = prefix .. 'ships'
+local previous = redis.call('HGET', ships, id)
+if not previous and ARGV[3] == '' then
+    redis.call('ZREM', prefix .. 'seen', id)
+    return 0
+end
+if previous then
+    local entry = cjson.decode(previous)
+    if entry['updated_at'] > tonumber(ARGV[4]) then
+        return 0
+    end
+    local sector_key = prefix .. 'sector:' .. entry['sector']
+    redis.call('SREM', sector_key, id)
+    if redis.call('SCARD', sector_key) == 0 then
+        redis.call('SREM', prefix .. 'sectors', entry['sector'])
+    end
+    if entry['target_planet'] ~= cjson.null then
+        redis.call('SREM', prefix .. 'target:' .. entry['target_planet'], id)
+    end
+end
+if ARGV[3] == '' then
+    redis.call('HDEL', ships, id)
+    redis.call('ZREM', prefix .. 'seen', id)
+    return 1
+end
+redis.call('HSET', ships, id, ARGV[3])
+redis.call('ZADD', prefix .. 'seen', ARGV[4], id)
+redis.call('SADD', prefix .. 'sector:' .. ARGV[5], id)
+redis.call('SADD', prefix .. 'sectors', ARGV[5])
+if ARGV[6] ~= '' then
+    redis.call('SADD', prefix .. 'target:' .. ARGV[6], id)
+end
+return 1
+"""
+
+
+class RedisFleetIndex(FleetIndex):
+    """
+    Redis-backed index shared by all worker processes
+
+    Ship entries live in one hash, with a set of ship IDs per occupied sector
+    and per target planet, and a sorted set of last-seen times for eviction.
+    """
+
+    def __init__(self, client: Any, prefix: str):
+        """
+        Initialize the Redis index
+
+        Args:
+            client: redis.asyncio client with decode_responses enabled
+            prefix: Prefix applied to every key
+        """
+        super().__init__()
+        self.prefix = prefix
+        self._redis = client
+        self._store_script = client.register_script(STORE_SCRIPT)
+
+    async def _entries(self, ids: Iterable[str]) -> List[ShipEntry]:
+        ids = list(ids)
+        if not ids:
+            return []
+        raw = await self._redis.hmget(self.prefix + "ships", ids)
+        return [ShipEntry.from_json(value) for value in raw if value is not None]
+
+    async def _store(self, entry: ShipEntry) -> None:
+        await self._store_script(args=[
+            self.prefix,
+            entry.sputnik_id,
+            entry.to_json(),
+            entry.updated_at,
+            sector_name(entry.sector),
+            entry.target_planet or ""
+        ])
+
+    async def near(
+        self,
+        position: List[float],
+        radius: float,
+        max_age: Optional[float] = None,
+        exclude: Optional[str] = None
+    ) -> List[Tuple[ShipEntry, float]]:
+        occupied = await self._redis.scard(self.prefix + "sectors")
+        # For very large radii visiting every ship is cheaper than every sector
+        if sector_count(position, radius) > occupied:
+            raw = await self._redis.hvals(self.prefix + "ships")
+            candidates = [ShipEntry.from_json(value) for value in raw]
+        else:
+            ids = await self._redis.sunion([
+                f"{self.prefix}sector:{sector_name(sector)}"
+                for sector in sectors_in_range(position, radius)
+            ])
+            candidates = await self._entries(ids)
+        return _within(candidates, position, radius, max_age, exclude)
+
+    async def targeting(self, planet_id: str, max_age: Optional[float] = None) -> List[ShipEntry]:
+        ids = await self._redis.smembers(f"{self.prefix}target:{planet_id}")
+        return _heading(await self._entries(ids), max_age)
+
+    async def evict(self, older_than: float) -> int:
+        ids = await self._redis.zrangebyscore(self.prefix + "seen", "-inf", older_than)
+        evicted = 0
+        for sputnik_id in ids:
+            evicted += await self._store_script(args=[self.prefix, sputnik_id, "", older_than, "", ""])
+        return evicted
+
+
+def create_fleet_index(cache: StateCache) -> FleetIndex:
+    """
+    Create the fleet index matching the state cache
+
+    Args:
+        cache: The process-wide state cache
+
+    Returns:
+        RedisFleetIndex sharing the connection of a RedisStateCache,
+        otherwise MemoryFleetIndex
+    """
+    if isinstance(cache, RedisStateCache):
+        logger.info("Using Redis fleet index")
+        return RedisFleetIndex(cache.client, cache.prefix + "fleet:")
+    if int(os.getenv("MCP_WORKERS", "1")) > 1:
+        logger.warning("Running multiple workers with an in-process fleet index. "
+                       "Each worker only knows the ships it has fetched.")
+    return MemoryFleetIndex()
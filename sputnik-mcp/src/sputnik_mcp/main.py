@@ -17,6 +17,15 @@ from .app import app, logger
 if __name__ == "__main__":
     host = os.getenv("MCP_HOST", "0.0.0.0")
     port = int(os.getenv("MCP_PORT", "8000"))
+    workers = int(os.getenv("MCP_WORKERS", "1"))
+    
+    # Multi-worker mode: this process only supervises workers and routes traffic
+    if workers > 1 and not os.getenv("MCP_WORKER_INDEX"):
+        from .workers import run
+        
+        logger.info(f"Starting Sputnik MCP server with {workers} workers on {host}:{port}")
+        run(host, port, workers)
+        raise SystemExit(0)
     
     logger.info(f"Starting Sputnik MCP server on {host}:{port}")
     logger.info(f"Connected to Sputnik API at {os.getenv('SPUTNIK_API_URL', 'http://localhost:3000')}")
@@ -0,0 +1,129 @@
+"""
+Tools for querying the positions of all known spaceships
+"""
+
+from typing import List, Optional
+import logging
+import os
+
+from pydantic import BaseModel, Field
+
+from ..app import app, get_fleet_index
+from ..fleet import ShipEntry
+from .spaceship import Vector3
+
+logger = logging.getLogger("sputnik_mcp.tools.fleet")
+
+# Ships whose last snapshot is older than this are left out of query results by default
+SHIP_MAX_AGE = float(os.getenv("MCP_SHIP_MAX_AGE", "300"))
+
+
+class ShipInfo(BaseModel):
+    """Latest known state of another spaceship"""
+    sputnik_id: str = Field(..., description="ID of the spaceship")
+    position: Vector3 = Field(..., description="Last known position")
+    distance: Optional[float] = Field(None, description="Distance from the query position")
+    is_moving: bool = Field(..., description="Whether the spaceship was moving")
+    destination: Optional[Vector3] = Field(None, description="Destination coordinates if moving")
+    target_planet: Optional[str] = Field(None, description="Planet the spaceship is heading to, if known")
+    age_seconds: float = Field(..., description="Seconds since the position was last seen")
+
+
+# Input model for ships_near tool
+class ShipsNearRequest(BaseModel):
+    """Input parameters for finding ships near a position"""
+    x: float = Field(..., description="X-coordinate of the query position")
+    y: float = Field(..., description="Y-coordinate of the query position")
+    z: float = Field(..., description="Z-coordinate of the query position")
+    radius: float = Field(..., gt=0, description="Search radius in world units")
+    sputnik_id: Optional[str] = Field(None, description="ID of your own spaceship, to leave it out of the results")
+    max_age: Optional[float] = Field(None, description="Ignore ships not seen for this many seconds")
+    limit: int = Field(50, gt=0, description="Maximum number of ships to return")
+
+
+# Result model for ships_near tool
+class ShipsNearResult(BaseModel):
+    """Ships within the search radius, nearest first"""
+    ships: List[ShipInfo] = Field(default_factory=list, description="Ships within the radius, nearest first")
+    total: int = Field(..., description="Number of ships within the radius before applying limit")
+
+
+# Input model for ships_targeting tool
+class ShipsTargetingRequest(BaseModel):
+    """Input parameters for finding ships heading to a planet"""
+    planet_id: str = Field(..., description="ID of the planet")
+    max_age: Optional[float] = Field(None, description="Ignore ships not seen for this many seconds")
+    limit: int = Field(50, gt=0, description="Maximum number of ships to return")
+
+
+# Result model for ships_targeting tool
+class ShipsTargetingResult(BaseModel):
+    """Ships heading to a planet, most recently seen first"""
+    ships: List[ShipInfo] = Field(default_factory=list, description="Ships heading to the planet")
+    total: int = Field(..., description="Number of ships heading to the planet before applying limit")
+
+
+def to_ship_info(entry: ShipEntry, distance: Optional[float] = None) -> ShipInfo:
+    """Convert a fleet index entry to the tool result model"""
+    destination = entry.destination
+    return ShipInfo(
+        sputnik_id=entry.sputnik_id,
+        position=Vector3(x=entry.position[0], y=entry.position[1], z=entry.position[2]),
+        distance=distance,
+        is_moving=entry.is_moving,
+        destination=Vector3(x=destination[0], y=destination[1], z=destination[2]) if destination else None,
+        target_planet=entry.target_planet,
+        age_seconds=round(entry.age, 3)
+    )
+
+
+@app.tool()
+async def ships_near(request: ShipsNearRequest) -> ShipsNearResult:
+    """
+    Find the spaceships within a radius of a position, nearest first.
+
+    Answers from the latest known positions of all ships this server has seen,
+    without contacting the Sputnik API. Positions of moving ships are as of
+    their last snapshot; check age_seconds.
+
+    Args:
+        request: The query position and radius
+
+    Returns:
+        The ships within the radius
+    """
+    max_age = request.max_age if request.max_age is not None else SHIP_MAX_AGE
+    matches = await get_fleet_index().near(
+        [request.x, request.y, request.z],
+        request.radius,
+        max_age=max_age,
+        exclude=request.sputnik_id
+    )
+    logger.info(f"Found {len(matches)} ships within {request.radius} of ({request.x}, {request.y}, {request.z})")
+    return ShipsNearResult(
+        ships=[to_ship_info(entry, round(distance, 3)) for entry, distance in matches[:request.limit]],
+        total=len(matches)
+    )
+
+
+@app.tool()
+async def ships_targeting(request: ShipsTargetingRequest) -> ShipsTargetingResult:
+    """
+    Find the spaceships heading to a planet.
+
+    Answers from the latest known destinations of all ships this server has seen,
+    without contacting the Sputnik API.
+
+    Args:
+        request: The planet to look up
+
+    Returns:
+        The ships heading to the planet
+    """
+    max_age = request.max_age if request.max_age is not None else SHIP_MAX_AGE
+    entries = await get_fleet_index().targeting(request.planet_id, max_age=max_age)
+    logger.info(f"Found {len(entries)} ships heading to planet {request.planet_id}")
+    return ShipsTargetingResult(
+        ships=[to_ship_info(entry) for entry in entries[:request.limit]],
+        total=len(entries)
+    )
@@ -2,16 +2,42 @@
 Tools for controlling the Sputnik spaceship
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
+import asyncio
+import hashlib
+import json
 import logging
+import math
+import os
+import time
 
 import httpx
 from pydantic import BaseModel, Field
 
-from ..app import app, get_api_client
+from ..app import app, get_api_client, get_fleet_index, get_state_cache
+from ..cache import route_key, snapshot_key, version_key
+from ..universe import FUEL_CONSUMPTION_RATE, SPACESHIP_SPEED, get_map_config, planet_at
 
 logger = logging.getLogger("sputnik_mcp.tools.spaceship")
 
+# How long a status snapshot is served from the shared cache before refetching
+SNAPSHOT_TTL = float(os.getenv("MCP_SNAPSHOT_TTL", "1.0"))
+
+# How long the last issued route is remembered
+ROUTE_TTL = float(os.getenv("MCP_ROUTE_TTL", "3600"))
+
+# How long past snapshot versions are kept for delta responses
+VERSION_HISTORY_TTL = float(os.getenv("MCP_VERSION_HISTORY_TTL", "600"))
+
+# Fraction of the fuel range and universe radius used for suggested destinations
+SUGGESTION_MARGIN = 0.95
+
+# Warn when a move would leave less fuel than this
+LOW_FUEL_WARNING = float(os.getenv("MCP_LOW_FUEL_WARNING", "10"))
+
+# Upstream status requests in flight in this worker, by spaceship
+_status_requests: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
 
 class Vector3(BaseModel):
     """A 3D vector representing position, velocity or rotation"""
@@ -30,6 +56,16 @@ class SpaceshipState(BaseModel):
     is_moving: bool = Field(..., description="Whether the spaceship is currently moving")
     destination: Optional[Vector3] = Field(None, description="Destination coordinates if moving")
     target_planet: Optional[str] = Field(None, description="Target planet identifier")
+    version: Optional[int] = Field(None, description="Version of this state; pass it as since_version to get only changes")
+
+
+# Result model for get_spaceship_state when since_version is given
+class SpaceshipStateDelta(BaseModel):
+    """Changes to the spaceship state since a previous version"""
+    sputnik_id: Optional[str] = Field(None, description="ID of the spaceship (for multiplayer mode)")
+    version: int = Field(..., description="Current version of the state")
+    unchanged: bool = Field(..., description="Whether the state is identical to since_version")
+    changes: Dict[str, Any] = Field(default_factory=dict, description="Fields that changed, with their new values")
 
 
 # Input model for move_spaceship tool
@@ -39,6 +75,18 @@ class MoveRequest(BaseModel):
     y: float = Field(..., description="Y-coordinate destination")
     z: float = Field(..., description="Z-coordinate destination")
     sputnik_id: Optional[str] = Field(None, description="ID of the spaceship to move (for multiplayer mode)")
+    force: bool = Field(False, description="Skip local pre-validation and always send the command to the server")
+
+
+# Result of validating a move locally before sending it
+class MoveValidation(BaseModel):
+    """Outcome of the local pre-validation of a move command"""
+    ok: bool = Field(..., description="Whether the move may be sent to the server")
+    code: Optional[str] = Field(None, description="Machine-readable rejection reason")
+    reason: Optional[str] = Field(None, description="Why the move was rejected")
+    warning: Optional[str] = Field(None, description="Warning for a move that is allowed")
+    suggested_destination: Optional[List[float]] = Field(None, description="A reachable destination in the same direction")
+    current_destination: Optional[List[float]] = Field(None, description="Current destination if ship is already moving")
 
 
 # Result model for move_spaceship tool
@@ -46,6 +94,9 @@ class MoveResult(BaseModel):
     """Result of a move command to the spaceship"""
     success: bool = Field(..., description="Whether the command was successful")
     error: Optional[str] = Field(None, description="Error message if command failed")
+    code: Optional[str] = Field(None, description="Machine-readable reason if the move was rejected locally")
+    warning: Optional[str] = Field(None, description="Warning about the move, e.g. low remaining fuel")
+    suggested_destination: Optional[List[float]] = Field(None, description="A reachable destination to try instead")
     current_destination: Optional[list[float]] = Field(None, description="Current destination if ship is already moving")
     state: Optional[Dict[str, Any]] = Field(None, description="Current state of the spaceship")
     sputnik_id: Optional[str] = Field(None, description="ID of the spaceship that was moved")
@@ -55,6 +106,260 @@ class MoveResult(BaseModel):
 class SpaceshipStateRequest(BaseModel):
     """Input parameters for getting the spaceship state"""
     sputnik_id: Optional[str] = Field(None, description="ID of the spaceship to get status for (for multiplayer mode)")
+    since_version: Optional[int] = Field(None, description="Version from a previous call; if given, only changes since that version are returned")
+
+
+async def index_ship(sputnik_id: Optional[str], state: Dict[str, Any], updated_at: Optional[float] = None) -> None:
+    """
+    Feed a ship's latest state into the fleet index
+    
+    Args:
+        sputnik_id: ID of the spaceship
+        state: The "state" part of a status response
+        updated_at: When the state was observed (defaults to now)
+    """
+    destination = state.get("destination")
+    is_moving = bool(state.get("isMoving", destination is not None))
+    target_planet = None
+    if is_moving and destination:
+        # Resolved from the destination: the reported targetPlanet is not updated by
+        # moves, so a move response still carries the previous target
+        target_planet = planet_at(await get_map_config(), destination)
+    await get_fleet_index().update(
+        sputnik_id or "default",
+        position=state["position"],
+        is_moving=is_moving,
+        destination=destination,
+        target_planet=target_planet,
+        updated_at=updated_at
+    )
+
+
+async def fetch_status(sputnik_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get the versioned status of a spaceship, served from the shared cache when fresh.
+    
+    Snapshots are shared by all worker processes, and concurrent polls of the same
+    ship that miss the cache in one worker share a single upstream request, so a
+    ship is fetched at most once per SNAPSHOT_TTL by each worker. Upstream
+    requests are conditional on the last known ETag, and the version number only
+    increases when the state actually changes. Versions are assigned with an
+    atomic update of the shared cache, so racing workers never reuse a version
+    or replace a snapshot with an older one.
+    
+    Args:
+        sputnik_id: Optional ID of the spaceship (for multiplayer mode)
+        
+    Returns:
+        The raw status response from the Sputnik API, with its "version" added
+    """
+    cached = await get_state_cache().get(snapshot_key(sputnik_id))
+    if cached is not None:
+        logger.debug(f"Serving cached snapshot for {sputnik_id or 'default'} spaceship")
+        return cached
+    
+    request_key = sputnik_id or "default"
+    task = _status_requests.get(request_key)
+    if task is None:
+        task = asyncio.ensure_future(refresh_status(sputnik_id))
+        _status_requests[request_key] = task
+        task.add_done_callback(lambda _: _status_requests.pop(request_key, None))
+    else:
+        logger.debug(f"Joining status request in flight for {request_key} spaceship")
+    
+    # A cancelled caller must not cancel the request for the others waiting on it
+    return await asyncio.shield(task)
+
+
+async def refresh_status(sputnik_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetch the status of a spaceship from the Sputnik API and store it as the latest snapshot
+    
+    Args:
+        sputnik_id: Optional ID of the spaceship (for multiplayer mode)
+        
+    Returns:
+        The raw status response from the Sputnik API, with its "version" added
+    """
+    cache = get_state_cache()
+    
+    latest = await cache.get(version_key(sputnik_id))
+    requested_at = time.time()
+    response = await get_api_client().get_status(sputnik_id, etag=latest["etag"] if latest else None)
+    
+    if response is None:
+        # Not modified since the latest version
+        response, etag = latest["result"], latest["etag"]
+    else:
+        # Fall back to hashing the state when the API does not send an ETag
+        etag = response.get("etag") or hashlib.sha1(
+            json.dumps(response["state"], sort_keys=True).encode()
+        ).hexdigest()
+    
+    changed = []
+    
+    def advance(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Runs atomically against other workers updating the same ship
+        changed.clear()
+        if current is not None and current["etag"] == etag:
+            return {**current, "fetched_at": max(current["fetched_at"], requested_at)}
+        if current is not None and current["fetched_at"] > requested_at:
+            # A snapshot requested after this one was stored in the meantime
+            return current
+        version = current["result"]["version"] + 1 if current else 1
+        changed.append(version)
+        return {
+            "etag": etag,
+            "result": {**response, "etag": etag, "version": version},
+            # When the state was last confirmed, for local move validation
+            "fetched_at": requested_at
+        }
+    
+    latest = await cache.update(version_key(sputnik_id), advance)
+    result = latest["result"]
+    if changed:
+        await cache.set(version_key(sputnik_id, result["version"]), result, ttl=VERSION_HISTORY_TTL)
+    
+    await index_ship(result.get("uuid") or sputnik_id, result["state"], updated_at=latest["fetched_at"])
+    
+    await cache.set(snapshot_key(sputnik_id), result, ttl=SNAPSHOT_TTL)
+    return result
+
+
+def to_spaceship_state(result: Dict[str, Any]) -> SpaceshipState:
+    """
+    Convert a status response from the Sputnik API into a SpaceshipState
+    
+    Args:
+        result: Status response, as returned by fetch_status
+        
+    Returns:
+        The spaceship state
+    """
+    state_data = result["state"]
+    
+    # Create the position vector
+    position = Vector3(
+        x=state_data["position"][0],
+        y=state_data["position"][1],
+        z=state_data["position"][2]
+    )
+    
+    # Create the velocity vector
+    velocity = Vector3(
+        x=state_data["velocity"][0],
+        y=state_data["velocity"][1],
+        z=state_data["velocity"][2]
+    )
+    
+    # Create the rotation vector
+    rotation = Vector3(
+        x=state_data["rotation"][0],
+        y=state_data["rotation"][1],
+        z=state_data["rotation"][2]
+    )
+    
+    # Create destination vector if it exists
+    destination = None
+    if state_data.get("destination"):
+        destination = Vector3(
+            x=state_data["destination"][0],
+            y=state_data["destination"][1],
+            z=state_data["destination"][2]
+        )
+    
+    return SpaceshipState(
+        sputnik_id=result.get("uuid"),
+        position=position,
+        velocity=velocity,
+        rotation=rotation,
+        fuel=state_data["fuel"],
+        is_moving=state_data["isMoving"],
+        destination=destination,
+        target_planet=state_data.get("targetPlanet"),
+        version=result.get("version")
+    )
+
+
+def _point_along(origin: List[float], target: List[float], distance: float) -> List[float]:
+    """Point at the given distance from origin towards target"""
+    length = math.dist(origin, target)
+    if length == 0:
+        return list(origin)
+    return [o + (t - o) * distance / length for o, t in zip(origin, target)]
+
+
+async def validate_move(request: MoveRequest) -> MoveValidation:
+    """
+    Validate a move locally against the map bounds and the last known ship state.
+    
+    The ship state is only taken from the cache, never fetched. The map
+    configuration comes from the cache too, but is loaded (from
+    SPUTNIK_MAP_CONFIG or GET /api/map) when it has expired after MAP_TTL.
+    State checks are skipped when no snapshot is known or a move was issued
+    after it.
+    
+    Args:
+        request: The move to validate
+        
+    Returns:
+        The validation outcome, with a reachable alternative when one exists
+    """
+    destination = [request.x, request.y, request.z]
+    
+    map_config = await get_map_config()
+    radius = float(map_config["universeRadius"])
+    # Planets are placed in a cube, drawing each axis from -radius to radius
+    extent = max(abs(c) for c in destination)
+    if extent > radius:
+        scale = radius * SUGGESTION_MARGIN / extent
+        return MoveValidation(
+            ok=False,
+            code="out_of_bounds",
+            reason=f"Destination is outside the universe, which spans -{radius:.0f} to {radius:.0f} on each axis.",
+            suggested_destination=[c * scale for c in destination]
+        )
+    
+    cache = get_state_cache()
+    latest = await cache.get(version_key(request.sputnik_id))
+    route = await cache.get(route_key(request.sputnik_id))
+    if latest is None or (route is not None and route["issued_at"] > latest["fetched_at"]):
+        return MoveValidation(ok=True)
+    
+    state = latest["result"]["state"]
+    position = state["position"]
+    
+    if state["isMoving"] and state.get("destination"):
+        # Still in flight unless the predicted arrival has passed since the snapshot
+        eta = math.dist(position, state["destination"]) / SPACESHIP_SPEED
+        if latest["fetched_at"] + eta > time.time():
+            return MoveValidation(
+                ok=False,
+                code="already_moving",
+                reason=f"Spaceship is already moving and arrives in about {latest['fetched_at'] + eta - time.time():.0f} seconds.",
+                current_destination=state["destination"]
+            )
+        return MoveValidation(ok=True)
+    
+    fuel = state["fuel"]
+    if fuel <= 0:
+        return MoveValidation(ok=False, code="no_fuel", reason="Cannot move the spaceship. No fuel remaining.")
+    
+    distance = math.dist(position, destination)
+    max_range = fuel / FUEL_CONSUMPTION_RATE
+    if distance > max_range:
+        return MoveValidation(
+            ok=False,
+            code="insufficient_fuel",
+            reason=f"Destination is {distance:.0f} units away but the remaining fuel ({fuel:.1f}) "
+                   f"only covers {max_range:.0f} units; the ship would be stranded.",
+            suggested_destination=_point_along(position, destination, max_range * SUGGESTION_MARGIN)
+        )
+    
+    remaining = fuel - distance * FUEL_CONSUMPTION_RATE
+    if remaining < LOW_FUEL_WARNING:
+        return MoveValidation(ok=True, warning=f"This move leaves only {remaining:.1f} fuel.")
+    return MoveValidation(ok=True)
 
 
 @app.tool()
@@ -63,6 +368,11 @@ async def move_spaceship(request: MoveRequest) -> MoveResult:
     Command the spaceship to move to the specified coordinates.
     Will fail if the spaceship is already moving to a destination.
     
+    Moves are checked locally first: destinations outside the universe, moves while
+    the ship is still flying, and moves beyond the range of the remaining fuel are
+    rejected without contacting the server, with a suggested reachable destination
+    where possible. Set force to skip these checks.
+    
     In multiplayer mode, you can specify which spaceship to move by providing a sputnik_id.
     If no sputnik_id is provided, the default spaceship will be moved.
     
@@ -74,13 +384,22 @@ async def move_spaceship(request: MoveRequest) -> MoveResult:
     """
     client = get_api_client()
     
+    validation = MoveValidation(ok=True)
+    if not request.force:
+        validation = await validate_move(request)
+        if not validation.ok:
+            logger.info(f"Rejected move locally ({validation.code}) for {request.sputnik_id or 'default'} spaceship")
+            return MoveResult(
+                success=False,
+                error=validation.reason,
+                code=validation.code,
+                current_destination=validation.current_destination,
+                suggested_destination=validation.suggested_destination,
+                sputnik_id=request.sputnik_id
+            )
+    
     try:
         result = await client.move_to(request.x, request.y, request.z, request.sputnik_id)
-        return MoveResult(
-            success=True,
-            state=result.get("state"),
-            sputnik_id=result.get("uuid") or request.sputnik_id
-        )
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 409:
             # The spaceship is already moving
@@ -103,10 +422,34 @@ async def move_spaceship(request: MoveRequest) -> MoveResult:
             error=f"An unexpected error occurred: {str(e)}",
             sputnik_id=request.sputnik_id
         )
+    
+    # The server accepted the move; failing to update the cache or index must not
+    # report it as failed, or the model would retry into a 409
+    try:
+        # The ship is now heading to the requested destination
+        if result.get("state"):
+            await index_ship(result.get("uuid") or request.sputnik_id, result["state"])
+        
+        # The cached snapshot is now stale; record the new route for all workers
+        cache = get_state_cache()
+        await cache.delete(snapshot_key(request.sputnik_id))
+        await cache.set(route_key(request.sputnik_id), {
+            "destination": [request.x, request.y, request.z],
+            "issued_at": time.time()
+        }, ttl=ROUTE_TTL)
+    except Exception as e:
+        logger.error(f"Error recording move of {request.sputnik_id or 'default'} spaceship: {e}", exc_info=True)
+    
+    return MoveResult(
+        success=True,
+        warning=validation.warning,
+        state=result.get("state"),
+        sputnik_id=result.get("uuid") or request.sputnik_id
+    )
 
 
 @app.tool()
-async def get_spaceship_state(request: SpaceshipStateRequest) -> SpaceshipState:
+async def get_spaceship_state(request: SpaceshipStateRequest) -> Union[SpaceshipState, SpaceshipStateDelta]:
     """
     Get the current state of the Sputnik spaceship including position, velocity,
     rotation, fuel level, and movement status.
@@ -114,68 +457,48 @@ async def get_spaceship_state(request: SpaceshipStateRequest) -> SpaceshipState:
     In multiplayer mode, you can specify which spaceship to query by providing a sputnik_id.
     If no sputnik_id is provided, the default spaceship will be queried.
     
+    Every state carries a version. Pass the version of a previous call as since_version
+    to get only what changed since then ("unchanged" if nothing did), which is much
+    smaller when polling an idle ship.
+    
     Args:
         request: The parameters for getting the spaceship state
         
     Returns:
-        The current state of the spaceship
+        The current state of the spaceship, or the changes since since_version
     """
     sputnik_id = request.sputnik_id or ""
     logger.info(f"Received request for spaceship state with ID: {sputnik_id}")
     
     try:
-        client = get_api_client()
-        logger.debug(f"Using API client with base URL: {client.base_url}")
-        
-        logger.info(f"Requesting status from API for spaceship: {sputnik_id}")
-        result = await client.get_status(sputnik_id)
+        logger.info(f"Requesting status for spaceship: {sputnik_id}")
+        result = await fetch_status(sputnik_id)
         logger.debug(f"Received API response: {result}")
         
-        state_data = result["state"]
-        
-        # Create the position vector
-        position = Vector3(
-            x=state_data["position"][0],
-            y=state_data["position"][1],
-            z=state_data["position"][2]
-        )
-        
-        # Create the velocity vector
-        velocity = Vector3(
-            x=state_data["velocity"][0],
-            y=state_data["velocity"][1],
-            z=state_data["velocity"][2]
-        )
-        
-        # Create the rotation vector
-        rotation = Vector3(
-            x=state_data["rotation"][0],
-            y=state_data["rotation"][1],
-            z=state_data["rotation"][2]
-        )
+        spaceship_state = to_spaceship_state(result)
         
-        # Create destination vector if it exists
-        destination = None
-        if state_data.get("destination"):
-            destination = Vector3(
-                x=state_data["destination"][0],
-                y=state_data["destination"][1],
-                z=state_data["destination"][2]
-            )
+        if request.since_version is not None:
+            if request.since_version == spaceship_state.version:
+                return SpaceshipStateDelta(
+                    sputnik_id=spaceship_state.sputnik_id,
+                    version=spaceship_state.version,
+                    unchanged=True
+                )
+            
+            previous = await get_state_cache().get(version_key(sputnik_id, request.since_version))
+            if previous is not None:
+                old_fields = to_spaceship_state(previous).model_dump(exclude={"version"})
+                new_fields = spaceship_state.model_dump(exclude={"version"})
+                return SpaceshipStateDelta(
+                    sputnik_id=spaceship_state.sputnik_id,
+                    version=spaceship_state.version,
+                    unchanged=False,
+                    changes={k: v for k, v in new_fields.items() if old_fields.get(k) != v}
+                )
+            logger.debug(f"Version {request.since_version} no longer available, returning full state")
         
-        # Return the full spaceship state
-        spaceship_state = SpaceshipState(
-            sputnik_id=result.get("uuid"),
-            position=position,
-            velocity=velocity,
-            rotation=rotation,
-            fuel=state_data["fuel"],
-            is_moving=state_data["isMoving"],
-            destination=destination,
-            target_planet=state_data.get("targetPlanet")
-        )
         logger.info(f"Successfully created spaceship state for {sputnik_id}")
         return spaceship_state
     except Exception as e:
         logger.error(f"Error getting spaceship state: {e}", exc_info=True)
-        raise 
\ No newline at end of file
+        raise
@@ -0,0 +1,78 @@
+"""
+Map configuration and movement constants of the Sputnik universe
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from .app import get_api_client, get_state_cache
+
+logger = logging.getLogger("sputnik_mcp.universe")
+
+# Must match the Sputnik server (FUEL_CONSUMPTION_RATE and NEXT_PUBLIC_SPACESHIP_SPEED)
+FUEL_CONSUMPTION_RATE = float(os.getenv("FUEL_CONSUMPTION_RATE", "0.01"))  # fuel units per distance unit
+SPACESHIP_SPEED = float(os.getenv("SPACESHIP_SPEED", "24.33"))  # units per second
+
+# Distance within which a ship counts as arriving (matches the server's ARRIVAL_THRESHOLD)
+ARRIVAL_THRESHOLD = 10.0
+
+# Used when the map configuration cannot be loaded
+DEFAULT_UNIVERSE_RADIUS = 10000.0
+
+# How long the map configuration is cached
+MAP_TTL = float(os.getenv("MCP_MAP_TTL", "300"))
+
+MAP_KEY = "map"
+
+
+async def get_map_config() -> Dict[str, Any]:
+    """
+    Get the map configuration, cached in the shared state cache.
+
+    Loaded from the file at SPUTNIK_MAP_CONFIG if set, otherwise from the
+    Sputnik API. Falls back to an empty map with the default universe radius
+    if neither is available.
+
+    Returns:
+        The map configuration with "planets" and "universeRadius"
+    """
+    cache = get_state_cache()
+    map_config = await cache.get(MAP_KEY)
+    if map_config is not None:
+        return map_config
+
+    try:
+        map_path = os.getenv("SPUTNIK_MAP_CONFIG")
+        if map_path:
+            with open(map_path, "r") as f:
+                map_config = json.load(f)
+        else:
+            map_config = await get_api_client().get_map()
+    except Exception as e:
+        logger.warning(f"Could not load map configuration, using defaults: {e}")
+        map_config = {}
+
+    map_config.setdefault("planets", [])
+    map_config.setdefault("universeRadius", DEFAULT_UNIVERSE_RADIUS)
+    await cache.set(MAP_KEY, map_config, ttl=MAP_TTL)
+    return map_config
+
+
+def planet_at(map_config: Dict[str, Any], point: List[float]) -> Optional[str]:
+    """
+    Find the planet at a point, e.g. the planet a ship's destination is on
+
+    Args:
+        map_config: Map configuration as returned by get_map_config
+        point: Coordinates to look up
+
+    Returns:
+        ID of the planet, or None if the point is not on a planet
+    """
+    for planet in map_config["planets"]:
+        if math.dist(point, planet["position"]) <= planet.get("size", 0) + ARRIVAL_THRESHOLD:
+            return str(planet["id"])
+    return None
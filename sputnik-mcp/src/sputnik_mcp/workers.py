@@ -0,0 +1,395 @@
+"""
+Multi-worker deployment for the Sputnik MCP server
+
+Runs N worker processes on private ports behind a single public port. A small
+sticky router keeps every SSE session on the worker that created it: the
+session ID is learned from the `endpoint` event of the SSE stream and later
+POSTs to /messages/?session_id=... are routed to the same worker. State that
+must be consistent across workers lives in the shared state cache (see cache.py).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import time
+from typing import Any, Dict, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger("sputnik_mcp.workers")
+
+# Maximum size of a request head accepted by the router
+MAX_HEAD_SIZE = 64 * 1024
+
+# How many bytes of an SSE response are inspected for the session ID
+SESSION_SNIFF_LIMIT = 8 * 1024
+
+SESSION_ID_PATTERN = re.compile(rb"session_id=([0-9a-fA-F-]+)")
+
+# Largest message body inspected for JSON-RPC request IDs
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+# While draining, an SSE stream is closed once it has had no outstanding
+# requests and no traffic for this many seconds
+DRAIN_IDLE_GRACE = 1.0
+DRAIN_POLL_INTERVAL = 0.25
+
+BAD_GATEWAY = (
+    b"HTTP/1.1 502 Bad Gateway\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 11\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Bad Gateway"
+)
+
+SERVICE_UNAVAILABLE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 19\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Service Unavailable"
+)
+
+
+def _request_ids(message: Any) -> Set[Any]:
+    """IDs of the JSON-RPC requests (not notifications) in a message or batch"""
+    messages = message if isinstance(message, list) else [message]
+    return {m["id"] for m in messages if isinstance(m, dict) and "method" in m and m.get("id") is not None}
+
+
+def _response_ids(message: Any) -> Set[Any]:
+    """IDs of the JSON-RPC responses in a message or batch"""
+    messages = message if isinstance(message, list) else [message]
+    return {
+        m["id"] for m in messages
+        if isinstance(m, dict) and ("result" in m or "error" in m) and m.get("id") is not None
+    }
+
+
+class SessionStream:
+    """
+    An open SSE stream and the requests of its session awaiting a response
+
+    With the SSE transport every client message is a separate POST and the
+    responses arrive on the stream, so a session is only idle once every
+    request POSTed for it has been answered on the stream.
+    """
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.pending: Set[Any] = set()
+        self.last_activity = time.monotonic()
+        self._buffer = b""
+
+    @property
+    def idle(self) -> bool:
+        return not self.pending and time.monotonic() - self.last_activity >= DRAIN_IDLE_GRACE
+
+    def on_message(self, body: bytes) -> None:
+        """Record a message POSTed by the client"""
+        self.last_activity = time.monotonic()
+        try:
+            self.pending |= _request_ids(json.loads(body))
+        except ValueError:
+            pass
+
+    def on_stream_data(self, chunk: bytes) -> None:
+        """Record data sent to the client on the stream"""
+        self._buffer = (self._buffer + chunk).replace(b"\r\n", b"\n")
+        *events, self._buffer = self._buffer.split(b"\n\n")
+        for event in events:
+            data = b"\n".join(
+                line[5:].strip() for line in event.split(b"\n") if line.startswith(b"data:")
+            )
+            if not data:
+                # Keep-alive comments are not activity
+                continue
+            self.last_activity = time.monotonic()
+            try:
+                self.pending -= _response_ids(json.loads(data))
+            except ValueError:
+                pass
+
+
+class Worker:
+    """A single MCP server process listening on a private port"""
+
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.sessions: Set[str] = set()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """Spawn the worker process"""
+        env = dict(os.environ)
+        env["MCP_HOST"] = "127.0.0.1"
+        env["MCP_PORT"] = str(self.port)
+        env["MCP_WORKER_INDEX"] = str(self.index)
+        # In its own session, so a terminal Ctrl-C only reaches the router, which
+        # drains connections before stopping the workers
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "sputnik_mcp.main", env=env, start_new_session=True
+        )
+        logger.info(f"Started worker {self.index} (pid {self.process.pid}) on port {self.port}")
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Ask the worker to shut down gracefully, killing it after a timeout
+
+        Args:
+            timeout: Seconds to wait for a graceful exit
+        """
+        if not self.alive:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Worker {self.index} did not exit after {timeout}s, killing it")
+            self.process.kill()
+            await self.process.wait()
+
+
+class StickyRouter:
+    """Routes HTTP connections to workers, pinning SSE sessions to their worker"""
+
+    def __init__(self, host: str, port: int, workers: list[Worker], drain_timeout: float):
+        """
+        Initialize the router
+
+        Args:
+            host: Public host to listen on
+            port: Public port to listen on
+            workers: Worker processes to route to
+            drain_timeout: Seconds to wait for open connections on shutdown
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self.session_workers: Dict[str, Worker] = {}
+        self.streams: Dict[str, SessionStream] = {}
+        self._connections: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._draining = False
+
+    def _pick_worker(self, session_id: Optional[str]) -> Optional[Worker]:
+        """Return the worker owning a session, or the least loaded live worker"""
+        if session_id:
+            worker = self.session_workers.get(session_id)
+            if worker is not None and worker.alive:
+                return worker
+        live = [w for w in self.workers if w.alive]
+        if not live:
+            return None
+        return min(live, key=lambda w: len(w.sessions))
+
+    def forget_worker_sessions(self, worker: Worker) -> None:
+        """Drop all session pins of a worker that went away"""
+        for session_id in worker.sessions:
+            self.session_workers.pop(session_id, None)
+            self.streams.pop(session_id, None)
+        worker.sessions.clear()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._on_connection, self.host, self.port, limit=MAX_HEAD_SIZE
+        )
+        logger.info(f"Router listening on {self.host}:{self.port} for {len(self.workers)} workers")
+
+    async def drain(self) -> None:
+        """
+        Refuse new sessions and close open ones as they become idle
+
+        Messages of open sessions are still routed, so requests in flight can
+        complete. Connections still open after the drain timeout are cancelled.
+        """
+        self._draining = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.drain_timeout
+        if self._connections:
+            logger.info(f"Draining {len(self._connections)} open connections "
+                        f"(timeout {self.drain_timeout}s)")
+        while self._connections and loop.time() < deadline:
+            for session_id, stream in list(self.streams.items()):
+                if stream.idle:
+                    logger.debug(f"Closing idle session {session_id}")
+                    stream.task.cancel()
+            await asyncio.sleep(DRAIN_POLL_INTERVAL)
+
+        pending = set(self._connections)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} connections still open after {self.drain_timeout}s")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+
+    async def _on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await self._proxy(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.CancelledError):
+            # Client errors and cancellation while draining just end the connection
+            pass
+        except Exception as e:
+            logger.error(f"Unexpected router error: {e}", exc_info=True)
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _proxy(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        head = await reader.readuntil(b"\r\n\r\n")
+        request_line, _, header_block = head.partition(b"\r\n")
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        path = urlsplit(target).path
+        session_id = parse_qs(urlsplit(target).query).get("session_id", [None])[0]
+
+        is_stream = method == "GET" and path.rstrip("/").endswith("/sse")
+        if self._draining and (is_stream or session_id not in self.streams):
+            # Only messages of sessions that are still open are accepted while draining
+            writer.write(SERVICE_UNAVAILABLE)
+            await writer.drain()
+            return
+
+        worker = self._pick_worker(session_id)
+        if worker is None:
+            writer.write(BAD_GATEWAY)
+            await writer.drain()
+            return
+
+        body = b""
+        stream = self.streams.get(session_id) if session_id else None
+        if method == "POST" and stream is not None:
+            # Read the message up front to track the requests it contains
+            length = 0
+            for line in header_block.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value.strip() or 0)
+            if 0 < length <= MAX_MESSAGE_SIZE:
+                body = await reader.readexactly(length)
+                stream.on_message(body)
+
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", worker.port)
+        except OSError as e:
+            logger.warning(f"Worker {worker.index} unreachable: {e}")
+            writer.write(BAD_GATEWAY)
+            await writer.drain()
+            return
+
+        # One request per connection keeps routing decisions per request
+        headers = [
+            line for line in header_block.split(b"\r\n")
+            if line and not line.lower().startswith((b"connection:", b"keep-alive:"))
+        ]
+        upstream_writer.write(
+            request_line + b"\r\n" + b"\r\n".join(headers + [b"Connection: close"]) + b"\r\n\r\n" + body
+        )
+
+        pinned: Optional[str] = None
+        try:
+            upload = asyncio.create_task(self._pipe(reader, upstream_writer))
+            if is_stream:
+                # The client going away ends the SSE session on the worker too
+                upload.add_done_callback(lambda _: upstream_writer.close())
+            sniffed = b""
+            while True:
+                chunk = await upstream_reader.read(65536)
+                if not chunk:
+                    break
+                if is_stream and pinned is None and len(sniffed) < SESSION_SNIFF_LIMIT:
+                    sniffed += chunk
+                    match = SESSION_ID_PATTERN.search(sniffed)
+                    if match:
+                        pinned = match.group(1).decode()
+                        self.session_workers[pinned] = worker
+                        self.streams[pinned] = SessionStream(asyncio.current_task())
+                        worker.sessions.add(pinned)
+                        logger.debug(f"Pinned session {pinned} to worker {worker.index}")
+                elif pinned is not None:
+                    self.streams[pinned].on_stream_data(chunk)
+                writer.write(chunk)
+                await writer.drain()
+            upload.cancel()
+        finally:
+            upstream_writer.close()
+            if pinned is not None:
+                self.session_workers.pop(pinned, None)
+                self.streams.pop(pinned, None)
+                worker.sessions.discard(pinned)
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def serve(host: str, port: int, num_workers: int) -> None:
+    """
+    Run the worker processes and the sticky router until signalled to stop
+
+    Args:
+        host: Public host to listen on
+        port: Public port to listen on
+        num_workers: Number of worker processes to run
+    """
+    base_port = int(os.getenv("MCP_WORKER_BASE_PORT", str(port + 1)))
+    drain_timeout = float(os.getenv("MCP_DRAIN_TIMEOUT", "30"))
+
+    workers = [Worker(i, base_port + i) for i in range(num_workers)]
+    for worker in workers:
+        await worker.start()
+
+    router = StickyRouter(host, port, workers, drain_timeout)
+    await router.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async def supervise(worker: Worker) -> None:
+        # Restart workers that exit unexpectedly until shutdown begins
+        while not stop.is_set():
+            await worker.process.wait()
+            if stop.is_set():
+                break
+            logger.warning(f"Worker {worker.index} exited with code {worker.process.returncode}, restarting")
+            router.forget_worker_sessions(worker)
+            await asyncio.sleep(1)
+            await worker.start()
+
+    supervisors = [asyncio.create_task(supervise(w)) for w in workers]
+
+    await stop.wait()
+    logger.info("Shutting down: draining connections")
+    await router.drain()
+    await asyncio.gather(*(w.stop(drain_timeout) for w in workers))
+    for task in supervisors:
+        task.cancel()
+    logger.info("All workers stopped")
+
+
+def run(host: str, port: int, num_workers: int) -> None:
+    """Blocking entry point for multi-worker mode"""
+    asyncio.run(serve(host, port, num_workers))
@@ -0,0 +1,101 @@
+"""
+Tests for versioned status snapshots
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from sputnik_mcp.cache import MemoryStateCache, snapshot_key, version_key
+from sputnik_mcp.tools import spaceship
+
+app_module = importlib.import_module("sputnik_mcp.app")
+
+
+def make_status(x, etag):
+    return {
+        "uuid": "ship",
+        "etag": etag,
+        "state": {
+            "position": [x, 0, 0],
+            "velocity": [0, 0, 0],
+            "rotation": [0, 0, 0],
+            "fuel": 100,
+            "isMoving": False,
+            "destination": None,
+        },
+    }
+
+
+class FakeClient:
+    """Returns the queued statuses, each after its delay"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    async def get_status(self, sputnik_id=None, etag=None):
+        delay, status = self.responses.pop(0)
+        await asyncio.sleep(delay)
+        if status is not None and status["etag"] == etag:
+            return None
+        return status
+
+    async def get_map(self):
+        return {"universeRadius": 10000, "planets": []}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = MemoryStateCache()
+    monkeypatch.setattr(app_module, "state_cache", cache)
+    return cache
+
+
+def test_version_only_increases_on_change(cache, monkeypatch):
+    monkeypatch.setattr(app_module, "api_client", FakeClient([
+        (0, make_status(0, '"a"')),
+        (0, make_status(0, '"a"')),
+        (0, make_status(5, '"b"')),
+    ]))
+
+    async def run():
+        versions = []
+        for _ in range(3):
+            versions.append((await spaceship.fetch_status("ship"))["version"])
+            await cache.delete(snapshot_key("ship"))
+        return versions
+
+    assert asyncio.run(run()) == [1, 1, 2]
+
+
+def test_slow_stale_response_does_not_replace_newer_snapshot(cache, monkeypatch):
+    # The first request is slow and returns an older state than the second
+    monkeypatch.setattr(app_module, "api_client", FakeClient([
+        (0.05, make_status(0, '"old"')),
+        (0, make_status(5, '"new"')),
+    ]))
+
+    # Two workers, so the requests are not coalesced
+    async def run():
+        first = asyncio.ensure_future(spaceship.refresh_status("ship"))
+        await asyncio.sleep(0.01)
+        second = await spaceship.refresh_status("ship")
+        return await first, second
+
+    first, second = asyncio.run(run())
+    latest = asyncio.run(cache.get(version_key("ship")))
+    assert latest["etag"] == '"new"'
+    assert first["version"] == second["version"] == 1
+
+
+def test_concurrent_misses_share_one_upstream_request(cache, monkeypatch):
+    client = FakeClient([(0.02, make_status(0, '"a"'))])
+    monkeypatch.setattr(app_module, "api_client", client)
+
+    async def run():
+        return await asyncio.gather(*(spaceship.fetch_status("ship") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert not client.responses
+    assert all(result["version"] == 1 for result in results)
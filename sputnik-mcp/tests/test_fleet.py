@@ -0,0 +1,56 @@
+"""
+Tests for the fleet index
+"""
+
+import asyncio
+import random
+import time
+
+from sputnik_mcp.fleet import MemoryFleetIndex
+
+
+def test_near_matches_brute_force():
+    index = MemoryFleetIndex()
+    rng = random.Random(1)
+
+    async def run():
+        for i in range(2000):
+            await index.update(str(i), [rng.uniform(-10000, 10000) for _ in range(3)], False)
+        return await index.near([0, 0, 0], 2500), await index.near([0, 0, 0], 30000)
+
+    near, everything = asyncio.run(run())
+    expected = {
+        sputnik_id for sputnik_id, entry in index.ships.items()
+        if sum(c * c for c in entry.position) ** 0.5 <= 2500
+    }
+    assert {entry.sputnik_id for entry, _ in near} == expected
+    assert [distance for _, distance in near] == sorted(distance for _, distance in near)
+    assert len(everything) == 2000
+
+
+def test_targeting_only_returns_ships_in_flight():
+    index = MemoryFleetIndex()
+
+    async def run():
+        await index.update("flying", [0, 0, 0], True, [500, 0, 0], target_planet="7")
+        await index.update("arrived", [500, 0, 0], False, None, target_planet="7")
+        await index.update("moved-on", [0, 0, 0], True, [500, 0, 0], target_planet="7")
+        await index.update("moved-on", [10, 0, 0], True, [0, 900, 0], target_planet="8")
+        return await index.targeting("7")
+
+    assert [entry.sputnik_id for entry in asyncio.run(run())] == ["flying"]
+
+
+def test_older_snapshots_are_ignored_and_stale_ships_evicted():
+    index = MemoryFleetIndex()
+    now = time.time()
+
+    async def run():
+        await index.update("a", [0, 0, 0], False, updated_at=now)
+        await index.update("a", [5000, 0, 0], False, updated_at=now - 10)
+        await index.update("b", [0, 0, 0], False, updated_at=now - 7200)
+        return await index.evict(now - 3600)
+
+    assert asyncio.run(run()) == 1
+    assert list(index.ships) == ["a"]
+    assert index.ships["a"].position == [0, 0, 0]
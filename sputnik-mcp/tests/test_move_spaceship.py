@@ -0,0 +1,56 @@
+"""
+Tests for the move_spaceship tool
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from sputnik_mcp.cache import MemoryStateCache
+from sputnik_mcp.tools import spaceship
+
+app_module = importlib.import_module("sputnik_mcp.app")
+
+
+class FakeClient:
+    """Accepts every move"""
+
+    async def move_to(self, x, y, z, sputnik_id=None):
+        return {
+            "uuid": sputnik_id,
+            "state": {
+                "position": [0, 0, 0],
+                "velocity": [1, 0, 0],
+                "rotation": [0, 0, 0],
+                "fuel": 100,
+                "isMoving": True,
+                "destination": [x, y, z],
+            },
+        }
+
+    async def get_map(self):
+        return {"universeRadius": 10000, "planets": []}
+
+
+class FailingCache(MemoryStateCache):
+    """Cache whose writes fail, e.g. Redis going away"""
+
+    async def set(self, key, value, ttl=None):
+        raise ConnectionError("cache unavailable")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(app_module, "api_client", client)
+    return client
+
+
+def test_accepted_move_succeeds_when_cache_write_fails(client, monkeypatch):
+    monkeypatch.setattr(app_module, "state_cache", FailingCache())
+
+    request = spaceship.MoveRequest(x=100, y=0, z=0, sputnik_id="ship", force=True)
+    result = asyncio.run(spaceship.move_spaceship(request))
+    assert result.success
+    assert result.sputnik_id == "ship"
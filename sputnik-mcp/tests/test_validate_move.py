@@ -0,0 +1,41 @@
+"""
+Tests for the local pre-validation of move commands
+"""
+
+import asyncio
+import importlib
+import json
+from pathlib import Path
+
+import pytest
+
+from sputnik_mcp.cache import MemoryStateCache
+from sputnik_mcp.tools.spaceship import MoveRequest, validate_move
+
+app_module = importlib.import_module("sputnik_mcp.app")
+
+MAP_CONFIG = Path(__file__).resolve().parents[2] / "sputnik" / "public" / "data" / "mapConfig.json"
+PLANETS = json.loads(MAP_CONFIG.read_text())["planets"]
+RADIUS = json.loads(MAP_CONFIG.read_text())["universeRadius"]
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setenv("SPUTNIK_MAP_CONFIG", str(MAP_CONFIG))
+    cache = MemoryStateCache()
+    monkeypatch.setattr(app_module, "state_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("planet", PLANETS, ids=lambda planet: str(planet["id"]))
+def test_every_planet_is_in_bounds(planet):
+    x, y, z = planet["position"]
+    validation = asyncio.run(validate_move(MoveRequest(x=x, y=y, z=z, sputnik_id="test-planets")))
+    assert validation.ok, validation.reason
+
+
+def test_outside_the_cube_is_rejected():
+    validation = asyncio.run(validate_move(MoveRequest(x=RADIUS * 2, y=0, z=-RADIUS, sputnik_id="test-bounds")))
+    assert not validation.ok
+    assert validation.code == "out_of_bounds"
+    assert max(abs(c) for c in validation.suggested_destination) <= RADIUS
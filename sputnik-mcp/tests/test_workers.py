@@ -0,0 +1,88 @@
+"""
+Tests for the request tracking of SSE sessions in the sticky router
+"""
+
+import json
+
+from sputnik_mcp import workers
+from sputnik_mcp.workers import SessionStream
+
+
+def sse(message, event="message"):
+    return f"event: {event}\r\ndata: {json.dumps(message)}\r\n\r\n".encode()
+
+
+def idle_for(stream, seconds):
+    stream.last_activity -= seconds
+
+
+def test_response_completes_request():
+    stream = SessionStream(None)
+    stream.on_message(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call"}).encode())
+    assert stream.pending == {1}
+
+    stream.on_stream_data(sse({"jsonrpc": "2.0", "id": 1, "result": {}}))
+    assert not stream.pending
+
+
+def test_event_split_across_chunks():
+    stream = SessionStream(None)
+    stream.on_message(json.dumps({"jsonrpc": "2.0", "id": "a", "method": "tools/call"}).encode())
+
+    event = sse({"jsonrpc": "2.0", "id": "a", "result": {"content": []}})
+    for i in range(0, len(event), 7):
+        stream.on_stream_data(event[i:i + 7])
+        if i + 7 < len(event):
+            assert stream.pending == {"a"}
+    assert not stream.pending
+
+
+def test_batches_and_notifications():
+    stream = SessionStream(None)
+    stream.on_message(json.dumps([
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/call"},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    ]).encode())
+    assert stream.pending == {1, 2}
+
+    # A server-to-client request with the same ID is not a response
+    stream.on_stream_data(sse({"jsonrpc": "2.0", "id": 1, "method": "ping"}))
+    assert stream.pending == {1, 2}
+
+    stream.on_stream_data(sse([
+        {"jsonrpc": "2.0", "id": 2, "result": {}},
+        {"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": "not found"}},
+    ]))
+    assert not stream.pending
+
+
+def test_client_responses_are_not_pending():
+    stream = SessionStream(None)
+    stream.on_message(json.dumps({"jsonrpc": "2.0", "id": 7, "result": {}}).encode())
+    stream.on_message(b"not json")
+    assert not stream.pending
+
+
+def test_idle_only_without_pending_requests_after_grace():
+    stream = SessionStream(None)
+    assert not stream.idle
+
+    idle_for(stream, workers.DRAIN_IDLE_GRACE)
+    assert stream.idle
+
+    stream.on_message(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call"}).encode())
+    idle_for(stream, workers.DRAIN_IDLE_GRACE * 10)
+    assert not stream.idle
+
+    stream.on_stream_data(sse({"jsonrpc": "2.0", "id": 1, "result": {}}))
+    assert not stream.idle
+    idle_for(stream, workers.DRAIN_IDLE_GRACE)
+    assert stream.idle
+
+
+def test_keep_alive_is_not_activity():
+    stream = SessionStream(None)
+    idle_for(stream, workers.DRAIN_IDLE_GRACE)
+    stream.on_stream_data(b": ping - 2025-01-01 00:00:00\r\n\r\n")
+    assert stream.idle
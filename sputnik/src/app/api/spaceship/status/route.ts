@@ -1,3 +1,4 @@
+import { createHash } from 'crypto';
 import { NextRequest, NextResponse } from 'next/server';
 import { getInterpolator } from '../interpolator';
 import { getSputnikUuid } from '@/lib/redis-streams';
@@ -39,20 +40,31 @@ export async function GET(request: NextRequest) {
     // Determine if spaceship is moving based on whether destination is set
     const isMoving = currentState.destination !== undefined && currentState.destination !== null;
     
+    const state = {
+      position: currentState.position,
+      velocity: currentState.velocity,
+      rotation: currentState.rotation || [0, 0, 0],
+      fuel: currentState.fuel,
+      isMoving: isMoving,
+      destination: currentState.destination || null,
+      targetPlanet: currentState.target_planet_id
+    };
+    
+    // ETag of the state so clients can poll with If-None-Match
+    const etag = `"${createHash('sha1').update(uuid + JSON.stringify(state)).digest('hex')}"`;
+    if (request.headers.get('if-none-match') === etag) {
+      return new NextResponse(null, { status: 304, headers: { ETag: etag } });
+    }
+    
     // Return the status response
-    return NextResponse.json({
-      success: true,
-      uuid: uuid,
-      state: {
-        position: currentState.position,
-        velocity: currentState.velocity,
-        rotation: currentState.rotation || [0, 0, 0],
-        fuel: currentState.fuel,
-        isMoving: isMoving,
-        destination: currentState.destination || null,
-        targetPlanet: currentState.target_planet_id
-      }
-    });
+    return NextResponse.json(
+      {
+        success: true,
+        uuid: uuid,
+        state
+      },
+      { headers: { ETag: etag } }
+    );
   } catch (error) {
     console.error('Error retrieving spaceship status:', error);
     return NextResponse.json(